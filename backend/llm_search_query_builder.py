@@ -5,25 +5,105 @@ Uses GPT-4o with a strict system prompt to generate comprehensive procurement se
 """
 
 import os
+import re
+import asyncio
+import copy
 import json
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI, OpenAI
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 MODEL = os.getenv("OPENAI_MODEL_QUERY", "gpt-4o-mini")  # Cheaper model for cost efficiency
 
+# The query is one paragraph (typically 150-250 tokens); cap generation just above that
+QUERY_MAX_TOKENS = int(os.getenv("QUERY_BUILDER_MAX_TOKENS", "350"))
+
+# Max in-flight OpenAI calls when building queries for a batch of selections
+BATCH_CONCURRENCY = int(os.getenv("QUERY_BUILDER_BATCH_CONCURRENCY", "8"))
+
+# OpenAI prompt-cache routing hint. Caching only applies to prefixes of 1024+
+# tokens; SYSTEM_PROMPT plus the JSON header is well under that today, so this
+# (and the cached-token log) only matter if the prompt grows past the minimum.
+PROMPT_CACHE_KEY = os.getenv("OPENAI_PROMPT_CACHE_KEY", "kiba-query-builder-v3")
+
+# Fixed key order for the user JSON (rarely-changing fields lead, per-selection
+# fields trail) so identical selections always serialize to the same payload.
+FIELD_ORDER = (
+    "usa_only",
+    "results_count",
+    "delivery_window_days",
+    "product_category",
+    "vendor_focus",
+    "delivery_state",
+    "delivery_city",
+    "quantity",
+    "budget_per_unit_usd",
+    "compliance",
+    "notes",
+    "domain_terms",
+    "specs",
+    "product_purpose",
+    "product_name",
+)
+
+# Exact-match result cache for completed queries (valid because temperature=0)
+RESULT_CACHE_SIZE = int(os.getenv("QUERY_BUILDER_CACHE_SIZE", "512"))
+_result_cache: "OrderedDict[str, str]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+# Near-duplicate cache over payload embeddings. Opt-in: selections that differ
+# only in quantity or delivery days embed very closely, so enable this only where
+# reusing a prior query for such variations is acceptable.
+SEMANTIC_CACHE_ENABLED = os.getenv("QUERY_BUILDER_SEMANTIC_CACHE", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("QUERY_BUILDER_SEMANTIC_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("QUERY_BUILDER_SEMANTIC_CACHE_SIZE", "256"))
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+_semantic_cache: "deque[tuple[List[float], str]]" = deque(maxlen=SEMANTIC_CACHE_SIZE)
+_semantic_cache_lock = threading.Lock()
+
+# Short-lived memo of build_query_json keyed by a canonical selection hash, so
+# retries with the same selection skip the rebuild
+QUERY_JSON_CACHE_SIZE = 256
+QUERY_JSON_CACHE_TTL_SECONDS = 300
+_query_json_cache: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_query_json_cache_lock = threading.Lock()
+
+# Output cleanup: drop a ```lang fence pair, then one matched pair of wrapping
+# quotes/backticks (a lone trailing " is an inch mark, e.g. 27", and is kept)
+_CODEFENCE_RE = re.compile(r"^```[a-z]*\n?|\n?```$")
+_WRAPPING_QUOTES_RE = re.compile(r'^(["`])(.*)\1$', re.DOTALL)
+
+# Opt-in: fully-specified selections are rendered locally (mirrors the SYSTEM_PROMPT example).
+# Selections with free-text fields the template cannot weave in (domain terms, user notes
+# beyond the category vendor note, which vendor_focus already covers) always go to the LLM.
+TEMPLATE_FAST_PATH_ENABLED = os.getenv("QUERY_BUILDER_TEMPLATE_FAST_PATH", "false").lower() == "true"
+_TEMPLATE_REQUIRED_FIELDS = ("product_name", "specs", "delivery_city", "delivery_state", "vendor_focus")
+_TEMPLATE_UNSUPPORTED_FIELDS = ("domain_terms",)
+
+# Static header placed ahead of the JSON in the user turn
+USER_PREAMBLE = "INPUT_JSON_FOLLOWS (keys in fixed order; empty values mean the field is absent):\n"
+
 SYSTEM_PROMPT = """
 You are the Knowmadics Corporate Procurement AI Assistant (Natural-Language Query Builder).
 
 MISSION
 From the user's JSON input (selected recommendation + delivery info), output ONE clean, single-paragraph instruction that a web-search agent can execute directly. It MUST begin with: "I want to buy ..."
 
-CRITICAL REQUIREMENT: If the JSON contains a "vendor_focus" field, you MUST include that exact text in your query. This is MANDATORY.
-
-HARD RULES (ARD RULES) - MUST FOLLOW:
+HARD RULES
 - No URLs/links in any output. Vendor names only.
-- Keep responses skimmable (bullets, short sentences).
-- Ask minimal questions; once enough is known, produce the decision pack.
-- If stretch has weak benefit, switch to alternate.
 - Honor Knowmadics policy context; flag exceptions explicitly.
 
 INPUT
@@ -31,51 +111,41 @@ INPUT
   product_name, product_purpose, domain_terms, specs (dict), compliance (list),
   budget_per_unit_usd, quantity, results_count, delivery_city, delivery_state,
   delivery_window_days, usa_only (bool), notes (free text), vendor_focus (string).
-- Treat unknown/missing fields as absent. Do NOT invent facts.
-- The vendor_focus field contains specific vendor names to include in the query - USE THIS EXACTLY.
+- Treat unknown/missing fields as absent. Empty strings, empty lists/objects and 0 also mean absent. Do NOT invent facts.
 
 OUTPUT (STRICT)
 - Exactly ONE paragraph. No bullets, no headers, no pre/post text, no code fences, no quotes.
-- First sentence MUST start with "I want to buy ...".
 - Include ONLY concrete constraints present in the JSON, plus the mandatory USA constraints below.
 - Use concise purchasing language, not explanations.
 
 CONTENT RULES
-1) Product & purpose
-   - Name the product clearly; include product_purpose and any domain_terms to disambiguate use cases.
-2) Key specs
-   - From specs, include materially decisive numeric/standard attributes (e.g., VRAM GB, bandwidth GB/s, CUDA cores, PCIe generation/lanes, watts/TDP, form factor, rack units, interface, memory type/speed, storage capacity, OS/driver requirements).
-   - Normalize units (GB, TB, GB/s, W, PCIe x16 Gen4, 1U, etc.). Do not add specs that are not in the JSON.
-3) Commercial constraints
-   - If results_count present, request that many; else default to 10.
-   - If budget_per_unit_usd present, include it as a per-unit budget cap.
-   - If quantity present, include exact quantity to purchase.
-4) Delivery
-   - If delivery_city/state present, include both.
-   - If delivery_window_days present, require "in stock" OR a clear lead time ≤ that window.
-5) USA-only & intent (ALWAYS include)
-   - "Show USA-based authorized vendors only that ship from the USA."
-   - "Include valid HTTPS purchase links" and "USD pricing."
-6) Availability
-   - Require "In stock" or a stated lead time; reject vague availability.
-7) Vendor Focus (MANDATORY)
-   - If vendor_focus field is present, you MUST include it in your query
-   - Copy the vendor_focus text EXACTLY as provided
-   - This field contains specific vendor names that MUST appear in the final query
-8) Style
-   - Single paragraph, declarative, procurement-oriented, no fluff, no placeholders, no hallucinated brands/models.
-
-DEFAULTS
-- results_count: 10 if missing (focus on quality over quantity).
-- Omit any category (specs/compliance/budget/delivery) if not present in the JSON—do NOT infer.
-
-EXAMPLES (FORMAT ONLY — DO NOT COPY VALUES)
+1) Product & purpose: name the product clearly; include product_purpose and any domain_terms to disambiguate use cases.
+2) Key specs: from specs, include materially decisive numeric/standard attributes (e.g., VRAM GB, bandwidth GB/s, PCIe generation/lanes, watts/TDP, form factor, rack units, interface, memory type/speed, storage capacity, OS/driver requirements). Normalize units (GB, TB, GB/s, W, PCIe x16 Gen4, 1U). Do not add specs that are not in the JSON.
+3) Commercial: request results_count results (default 10); include budget_per_unit_usd as a per-unit cap and the exact quantity when present.
+4) Delivery: include delivery_city/state when present; with delivery_window_days, require "in stock" OR a clear lead time ≤ that window.
+5) USA-only (ALWAYS include): "Show USA-based authorized vendors only that ship from the USA." plus "Include valid HTTPS purchase links" and "USD pricing."
+6) Availability: require "In stock" or a stated lead time; reject vague availability.
+7) Vendor focus (MANDATORY): if vendor_focus is present, copy its text EXACTLY into the query.
+8) Style: single paragraph, declarative, procurement-oriented, no fluff, no placeholders, no hallucinated brands/models.
+
+EXAMPLE (FORMAT ONLY — DO NOT COPY VALUES)
 I want to buy 8 NVIDIA H100 PCIe accelerators for LLM fine-tuning and hosting, each with 80 GB HBM, PCIe Gen5 x16, ≥2.0 TB/s memory bandwidth, and 350 W TDP; target budget is ≤ $28,000 per unit; deliver to Austin, TX within 14 days with in-stock units or confirmed lead time ≤ 14 days. Show USA-based authorized vendors only that ship from the USA. Focus on NVIDIA direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, B&H, WWT. Include valid HTTPS purchase links, USD pricing, and availability status. Return up to 10 results.
+"""
 
-I want to buy 4 1U rack servers for on-prem vector DB, each with dual AMD EPYC, 512 GB DDR5, 2× 3.84 TB NVMe, dual 25GbE, and TPM 2.0; deliver to Reston, VA within 21 days with in-stock or lead time ≤ 21 days. Show USA-based authorized vendors only that ship from the USA. Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT. Include valid HTTPS purchase links, USD pricing, and availability status. Return up to 10 results.
 
-I want to buy 100 CrowdStrike Falcon Complete licenses for comprehensive endpoint detection and response, with a target budget of ≤ $8.99 per unit; deliver to Reston, VA within 14 days with in-stock units or confirmed lead time ≤ 14 days. Show USA-based authorized vendors only that ship from the USA. Focus on Optiv, CDW, SHI, GuidePoint Security, Insight, Carahsoft (public sector), Softcat (USA only). Include valid HTTPS purchase links, USD pricing, and availability status. Return up to 10 results.
-"""
+def _constraint_value(req: Any) -> str:
+    """Value of a MUST constraint given as {"key", "value"} dict or plain string."""
+    if isinstance(req, dict):
+        return req.get("value", "")
+    return req if isinstance(req, str) else ""
+
+
+def _should_note(req: Any) -> str:
+    """Render a SHOULD constraint as a "Prefer ..." note ("" if it has no value)."""
+    if isinstance(req, dict):
+        value = req.get("value", "")
+        return f"Prefer {req.get('key', '')}: {value}" if value else ""
+    return f"Prefer {req}" if isinstance(req, str) else ""
 
 
 def build_query_json(selection: Dict[str, Any]) -> Dict[str, Any]:
@@ -88,8 +158,10 @@ def build_query_json(selection: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Simplified JSON for LLM query builder
     """
+    # Copies so the caller's selection is never mutated (keeps repeat calls identical)
     variant = selection.get("selected_variant", {})
-    delivery = selection.get("delivery_location", {})
+    delivery = dict(selection.get("delivery_location", {}))
+    budget_per_unit = variant.get("est_unit_price_usd", 0)
     
     # Extract product purpose from various possible fields
     product_purpose = (
@@ -99,31 +171,16 @@ def build_query_json(selection: Dict[str, Any]) -> Dict[str, Any]:
     )
     
     # Extract domain terms
-    domain_terms = selection.get("domain_terms", [])
+    domain_terms = list(selection.get("domain_terms", []))
     category = selection.get("product_category", "")
     if category and category not in domain_terms:
         domain_terms = [category] + domain_terms
     
     # Build compliance list from MUST constraints
-    compliance = []
-    for req in variant.get("must", []):
-        if isinstance(req, dict):
-            value = req.get("value", "")
-            if value:
-                compliance.append(value)
-        elif isinstance(req, str):
-            compliance.append(req)
+    compliance = [v for v in map(_constraint_value, variant.get("must", ())) if v]
     
     # Add should constraints as notes
-    should_notes = []
-    for req in variant.get("should", []):
-        if isinstance(req, dict):
-            key = req.get("key", "")
-            value = req.get("value", "")
-            if value:
-                should_notes.append(f"Prefer {key}: {value}")
-        elif isinstance(req, str):
-            should_notes.append(f"Prefer {req}")
+    should_notes = [n for n in map(_should_note, variant.get("should", ())) if n]
     
     # Enhanced vendor search information from KPA recommendations
     vendor_search_info = selection.get("vendor_search", {})
@@ -153,8 +210,8 @@ def build_query_json(selection: Dict[str, Any]) -> Dict[str, Any]:
         
         # Add budget hint if available
         budget_hint = vendor_search_info.get("budget_hint_usd")
-        if budget_hint and not variant.get("est_unit_price_usd"):
-            variant["est_unit_price_usd"] = budget_hint
+        if budget_hint and not budget_per_unit:
+            budget_per_unit = budget_hint
     else:
         product_name = selection.get("product_name", "")
     
@@ -169,13 +226,13 @@ def build_query_json(selection: Dict[str, Any]) -> Dict[str, Any]:
     # Add explicit vendor focus field for LLM
     vendor_focus = get_vendor_focus_instruction(product_category, product_name)
     
-    query_json = {
+    values = {
         "product_name": product_name,
         "product_purpose": product_purpose,
         "domain_terms": domain_terms,
         "specs": variant.get("metrics", {}),
         "compliance": compliance,
-        "budget_per_unit_usd": variant.get("est_unit_price_usd", 0),
+        "budget_per_unit_usd": budget_per_unit,
         "quantity": variant.get("quantity", 1),
         "results_count": selection.get("results_limit", 10),  # Focus on quality over quantity
         "delivery_city": delivery.get("city", ""),
@@ -187,8 +244,24 @@ def build_query_json(selection: Dict[str, Any]) -> Dict[str, Any]:
         "vendor_focus": vendor_focus  # Explicit vendor focus instruction
     }
     
-    # Remove empty values
-    return {k: v for k, v in query_json.items() if v}
+    # Keep every key (falsy values act as the "absent" sentinel) in FIELD_ORDER
+    return {k: values[k] for k in FIELD_ORDER}
+
+
+# Category keywords in priority order (first match wins), matched as substrings
+# of the lower-cased product name and domain terms. Each list is compiled into a
+# single alternation so a category costs one regex scan instead of N `in` checks.
+_CATEGORY_KEYWORDS = (
+    ("gpu", ("gpu", "graphics", "rtx", "gtx", "nvidia", "amd", "radeon", "cuda", "tensor")),
+    ("security_saas", ("security", "firewall", "antivirus", "endpoint", "siem", "soar", "xdr", "edr", "mdr", "saas")),
+    ("hardware", ("server", "rack", "1u", "2u", "blade", "chassis", "cpu", "epyc", "xeon", "intel", "amd")),
+    ("storage", ("storage", "nas", "san", "ssd", "nvme", "raid", "disk", "drive")),
+    ("networking", ("switch", "router", "firewall", "network", "ethernet", "wifi", "wireless", "cable")),
+)
+_CATEGORY_PATTERNS = tuple(
+    (category, re.compile("|".join(map(re.escape, keywords))))
+    for category, keywords in _CATEGORY_KEYWORDS
+)
 
 
 def determine_product_category(product_name: str, domain_terms: list) -> str:
@@ -202,34 +275,46 @@ def determine_product_category(product_name: str, domain_terms: list) -> str:
     Returns:
         Product category string
     """
-    product_lower = product_name.lower()
-    terms_lower = [term.lower() for term in domain_terms]
-    all_terms = [product_lower] + terms_lower
-    
-    # GPU/Graphics cards
-    if any(term in " ".join(all_terms) for term in ["gpu", "graphics", "rtx", "gtx", "nvidia", "amd", "radeon", "cuda", "tensor"]):
-        return "gpu"
-    
-    # Security software/SaaS
-    if any(term in " ".join(all_terms) for term in ["security", "firewall", "antivirus", "endpoint", "siem", "soar", "xdr", "edr", "mdr", "saas"]):
-        return "security_saas"
-    
-    # Servers/Hardware
-    if any(term in " ".join(all_terms) for term in ["server", "rack", "1u", "2u", "blade", "chassis", "cpu", "epyc", "xeon", "intel", "amd"]):
-        return "hardware"
-    
-    # Storage
-    if any(term in " ".join(all_terms) for term in ["storage", "nas", "san", "ssd", "nvme", "raid", "disk", "drive"]):
-        return "storage"
-    
-    # Networking
-    if any(term in " ".join(all_terms) for term in ["switch", "router", "firewall", "network", "ethernet", "wifi", "wireless", "cable"]):
-        return "networking"
+    haystack = " ".join([product_name, *domain_terms]).lower()
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(haystack):
+            return category
     
     # Default to hardware
     return "hardware"
 
 
+# Vendor guidance per product category, shared by the notes and vendor_focus fields
+_VAR_RESELLERS = "CDW, SHI, Insight, Connection, Zones, WWT"
+_VAR_RESELLERS_GPU = "CDW, SHI, Insight, Connection, Zones, B&H, WWT"
+_SECURITY_VENDORS = "Focus on Optiv, CDW, SHI, GuidePoint Security, Insight, Carahsoft (public sector), Softcat (USA only)"
+_DEFAULT_VENDOR_NOTE = f"Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including {_VAR_RESELLERS}"
+
+VENDOR_NOTES: Dict[str, str] = {
+    "gpu": f"Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including {_VAR_RESELLERS_GPU}",
+    "security_saas": _SECURITY_VENDORS,
+    "hardware": _DEFAULT_VENDOR_NOTE,
+    "storage": _DEFAULT_VENDOR_NOTE,
+    "networking": _DEFAULT_VENDOR_NOTE,
+}
+
+# Manufacturer-direct focus templates; {manufacturer} is the detected brand
+VENDOR_FOCUS_TEMPLATES: Dict[str, str] = {
+    "gpu": f"Focus on {{manufacturer}} direct sales plus category-leading enterprise resellers/VARs including {_VAR_RESELLERS_GPU}",
+    "default": f"Focus on {{manufacturer}} direct sales plus category-leading enterprise resellers/VARs including {_VAR_RESELLERS}",
+}
+
+# (substring of lower-cased product name, manufacturer display name), checked in order
+_MFR_MARKERS = (
+    ("nvidia", "NVIDIA"),
+    ("dell", "Dell"),
+    ("hp", "HP"),
+    ("cisco", "Cisco"),
+    ("crowdstrike", "CrowdStrike"),
+    ("microsoft", "Microsoft"),
+)
+
+
 def get_vendor_optimization_notes(product_category: str) -> str:
     """
     Get vendor optimization notes based on product category.
@@ -240,15 +325,7 @@ def get_vendor_optimization_notes(product_category: str) -> str:
     Returns:
         Vendor optimization notes string
     """
-    vendor_mapping = {
-        "gpu": "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, B&H, WWT",
-        "security_saas": "Focus on Optiv, CDW, SHI, GuidePoint Security, Insight, Carahsoft (public sector), Softcat (USA only)",
-        "hardware": "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT",
-        "storage": "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT",
-        "networking": "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT"
-    }
-    
-    return vendor_mapping.get(product_category, "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT")
+    return VENDOR_NOTES.get(product_category, _DEFAULT_VENDOR_NOTE)
 
 
 def get_vendor_focus_instruction(product_category: str, product_name: str) -> str:
@@ -262,33 +339,255 @@ def get_vendor_focus_instruction(product_category: str, product_name: str) -> st
     Returns:
         Vendor focus instruction string
     """
-    # Extract manufacturer name from product name
-    manufacturer = ""
-    if "nvidia" in product_name.lower():
-        manufacturer = "NVIDIA"
-    elif "dell" in product_name.lower():
-        manufacturer = "Dell"
-    elif "hp" in product_name.lower():
-        manufacturer = "HP"
-    elif "cisco" in product_name.lower():
-        manufacturer = "Cisco"
-    elif "crowdstrike" in product_name.lower():
-        manufacturer = "CrowdStrike"
-    elif "microsoft" in product_name.lower():
-        manufacturer = "Microsoft"
+    if product_category == "security_saas":
+        return _SECURITY_VENDORS
     
-    if product_category == "gpu":
-        if manufacturer:
-            return f"Focus on {manufacturer} direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, B&H, WWT"
+    # Extract manufacturer name from product name
+    pl = product_name.lower()
+    manufacturer = next((mfr for marker, mfr in _MFR_MARKERS if marker in pl), "manufacturer")
+    template = VENDOR_FOCUS_TEMPLATES["gpu" if product_category == "gpu" else "default"]
+    return template.format(manufacturer=manufacturer)
+
+
+def _dumps_compact(obj: Any) -> str:
+    """Serialize to compact JSON (no whitespace), using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass  # Unsupported type; stdlib json handles it identically below
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _selection_key(selection: Dict[str, Any]) -> Optional[str]:
+    """Canonical hash of a selection, or None if it cannot be serialized."""
+    try:
+        if ORJSON_AVAILABLE:
+            raw = orjson.dumps(selection, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
         else:
-            return "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, B&H, WWT"
-    elif product_category == "security_saas":
-        return "Focus on Optiv, CDW, SHI, GuidePoint Security, Insight, Carahsoft (public sector), Softcat (USA only)"
+            raw = json.dumps(selection, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    except TypeError:
+        return None
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def build_query_json_cached(selection: Dict[str, Any]) -> Dict[str, Any]:
+    """build_query_json with a TTL memo.
+    
+    The memo holds a private deep copy and hits return another, so callers may
+    mutate the result (including nested specs/compliance/notes) freely.
+    """
+    key = _selection_key(selection)
+    if key is None:
+        return build_query_json(selection)
+    
+    now = time.monotonic()
+    with _query_json_cache_lock:
+        entry = _query_json_cache.get(key)
+        if entry is not None and now - entry[0] < QUERY_JSON_CACHE_TTL_SECONDS:
+            _query_json_cache.move_to_end(key)
+            return copy.deepcopy(entry[1])
+    
+    query_json = build_query_json(selection)
+    # build_query_json shares the selection's own specs dict, so never memoize it as-is
+    stored = copy.deepcopy(query_json)
+    with _query_json_cache_lock:
+        _query_json_cache[key] = (now, stored)
+        _query_json_cache.move_to_end(key)
+        while len(_query_json_cache) > QUERY_JSON_CACHE_SIZE:
+            _query_json_cache.popitem(last=False)
+    return query_json
+
+
+@lru_cache(maxsize=4)
+def _get_client(key: Optional[str]) -> OpenAI:
+    """Return a shared OpenAI client per API key so HTTP connections are pooled."""
+    return OpenAI(api_key=key or os.getenv("OPENAI_API_KEY"))
+
+
+@lru_cache(maxsize=4)
+def _get_async_client(key: Optional[str]) -> AsyncOpenAI:
+    """Async counterpart of _get_client, used by the batch fan-out path."""
+    return AsyncOpenAI(api_key=key or os.getenv("OPENAI_API_KEY"))
+
+
+def _result_cache_key(model: str, payload: str) -> str:
+    """Hash the model and the canonical user payload into a compact cache key."""
+    return hashlib.blake2b(f"{model}\n{payload}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _result_cache_get(cache_key: str) -> Optional[str]:
+    with _result_cache_lock:
+        query = _result_cache.get(cache_key)
+        if query is not None:
+            _result_cache.move_to_end(cache_key)
+        return query
+
+
+def _result_cache_put(cache_key: str, query: str) -> None:
+    with _result_cache_lock:
+        _result_cache[cache_key] = query
+        _result_cache.move_to_end(cache_key)
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
+
+def _normalize(vec: List[float]) -> List[float]:
+    """L2-normalize a vector so a dot product equals cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def _embed(client: OpenAI, text: str) -> Optional[List[float]]:
+    """Embed text for the semantic cache (None if the embedding call fails)."""
+    try:
+        resp = client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    except Exception as e:
+        logger.warning(f"Query builder embedding failed, skipping semantic cache: {e}")
+        return None
+    return _normalize(resp.data[0].embedding)
+
+
+async def _aembed(client: AsyncOpenAI, text: str) -> Optional[List[float]]:
+    """Async counterpart of _embed."""
+    try:
+        resp = await client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    except Exception as e:
+        logger.warning(f"Query builder embedding failed, skipping semantic cache: {e}")
+        return None
+    return _normalize(resp.data[0].embedding)
+
+
+def _semantic_cache_lookup(vec: List[float]) -> Optional[str]:
+    """Return the cached query whose embedding is most similar, if above threshold."""
+    best_score, best_query = 0.0, None
+    with _semantic_cache_lock:
+        entries = list(_semantic_cache)
+    for cached_vec, query in entries:
+        score = sum(a * b for a, b in zip(vec, cached_vec))
+        if score > best_score:
+            best_score, best_query = score, query
+    if best_score >= SEMANTIC_CACHE_THRESHOLD:
+        logger.info(f"Query builder semantic cache hit (cosine={best_score:.3f})")
+        return best_query
+    return None
+
+
+def _log_cache_usage(resp: Any) -> None:
+    """Log how many prompt tokens were served from OpenAI's prompt cache."""
+    usage = getattr(resp, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    if usage is None or details is None:
+        return
+    cached = getattr(details, "cached_tokens", 0) or 0
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    hit_rate = (cached / prompt * 100) if prompt else 0.0
+    logger.info(f"Query builder prompt cache: {cached}/{prompt} tokens cached ({hit_rate:.0f}%)")
+
+
+def _completion_kwargs(model: str, payload: str) -> Dict[str, Any]:
+    """Arguments for the streamed chat completion shared by sync and async paths."""
+    # Streamed so the connection starts yielding immediately and a stalled
+    # response trips the read timeout instead of waiting for the full body
+    return dict(
+        model=model,
+        temperature=0,  # Deterministic
+        max_tokens=QUERY_MAX_TOKENS,
+        stop=["\n\n"],  # Output is a single paragraph
+        response_format={"type": "text"},
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": payload}
+        ],
+        extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+
+
+def _collect_chunk(chunk: Any, pieces: List[str]) -> None:
+    """Append a streamed delta to pieces and log usage from the final chunk."""
+    if chunk.choices:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            pieces.append(delta)
+    if getattr(chunk, "usage", None):
+        _log_cache_usage(chunk)
+
+
+def _clean_query(query: str) -> str:
+    """Clean up any accidental formatting (code fences, wrapping quotes) from the LLM output."""
+    query = _CODEFENCE_RE.sub("", query.strip()).strip()
+    return _WRAPPING_QUOTES_RE.sub(r"\2", query).strip()
+
+
+def _remember(cache_key: str, query: str, vec: Optional[List[float]]) -> None:
+    """Store a generated query in the exact-match and semantic caches."""
+    if not query:
+        return
+    _result_cache_put(cache_key, query)
+    if vec is not None:
+        with _semantic_cache_lock:
+            _semantic_cache.append((vec, query))
+
+
+def _has_user_notes(query_json: Dict[str, Any]) -> bool:
+    """True when notes carry more than the category vendor note build_query_json always appends."""
+    notes = query_json.get("notes") or ""
+    vendor_note = get_vendor_optimization_notes(query_json.get("product_category", ""))
+    return bool(notes) and notes != vendor_note
+
+
+def _can_template(query_json: Dict[str, Any]) -> bool:
+    """True when every field the LLM would otherwise synthesize is already present."""
+    return (
+        TEMPLATE_FAST_PATH_ENABLED
+        and all(query_json.get(f) for f in _TEMPLATE_REQUIRED_FIELDS)
+        and isinstance(query_json["specs"], dict)
+        and not any(query_json.get(f) for f in _TEMPLATE_UNSUPPORTED_FIELDS)
+        and not _has_user_notes(query_json)
+    )
+
+
+def _template_query(query_json: Dict[str, Any]) -> str:
+    """Render the search instruction for a fully-specified selection without an LLM call."""
+    quantity = query_json.get("quantity") or 1
+    intro = f"I want to buy {quantity} {query_json['product_name']}"
+    if query_json.get("product_purpose"):
+        intro += f" for {query_json['product_purpose']}"
+    specs = ", ".join(f"{k}: {v}" for k, v in query_json["specs"].items() if v not in (None, ""))
+    clauses = [f"{intro}, with {specs}" if specs else intro]
+    if query_json.get("compliance"):
+        clauses.append(f"must meet {', '.join(map(str, query_json['compliance']))}")
+    budget = query_json.get("budget_per_unit_usd")
+    if budget:
+        budget_str = f"{budget:,.2f}" if isinstance(budget, (int, float)) else str(budget).lstrip("$")
+        clauses.append(f"target budget is ≤ ${budget_str} per unit")
+    
+    delivery = f"deliver to {query_json['delivery_city']}, {query_json['delivery_state']}"
+    days = query_json.get("delivery_window_days")
+    if days:
+        delivery += f" within {days} days with in-stock units or confirmed lead time ≤ {days} days"
     else:
-        if manufacturer:
-            return f"Focus on {manufacturer} direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT"
-        else:
-            return "Focus on manufacturer direct sales plus category-leading enterprise resellers/VARs including CDW, SHI, Insight, Connection, Zones, WWT"
+        delivery += " with in-stock units or a confirmed lead time"
+    clauses.append(delivery)
+    
+    usa = "Show USA-based authorized vendors only that ship from the USA. " if query_json.get("usa_only") else ""
+    return (
+        "; ".join(clauses) + ". "
+        f"{usa}"
+        f"{query_json['vendor_focus'].rstrip('.')}. "
+        "Include valid HTTPS purchase links, USD pricing, and availability status. "
+        f"Return up to {query_json.get('results_count') or 10} results."
+    )
+
+
+def _fallback_query(query_json: Dict[str, Any]) -> str:
+    """Simple query used when the LLM call fails."""
+    product = query_json.get("product_name") or "product"
+    specs = query_json.get("specs", {})
+    spec_str = " ".join(str(v) for v in list(specs.values())[:5])
+    return f"I want to buy {product} {spec_str}. Show USA-based authorized vendors only that ship from the USA. Include valid HTTPS purchase links and USD pricing."
 
 
 def generate_search_query_with_llm(
@@ -310,41 +609,104 @@ def generate_search_query_with_llm(
     Returns:
         Single-paragraph comprehensive search instruction
     """
-    client = OpenAI(api_key=key or os.getenv("OPENAI_API_KEY"))
-    
     # Transform selection into clean JSON for LLM
-    query_json = build_query_json(selection)
+    query_json = build_query_json_cached(selection)
+    if _can_template(query_json):
+        return _template_query(query_json)
+    payload = USER_PREAMBLE + _dumps_compact(query_json)
+    
+    # Identical selections produce identical queries at temperature=0
+    cache_key = _result_cache_key(model, payload)
+    cached = _result_cache_get(cache_key)
+    if cached is not None:
+        return cached
     
     # Call LLM with strict system prompt
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=0,  # Deterministic
-            max_tokens=800,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": json.dumps(query_json, ensure_ascii=False, indent=2)}
-            ]
-        )
+        client = _get_client(key)
         
-        query = resp.choices[0].message.content or ""
+        vec = _embed(client, payload) if SEMANTIC_CACHE_ENABLED else None
+        if vec is not None:
+            similar = _semantic_cache_lookup(vec)
+            if similar is not None:
+                _result_cache_put(cache_key, similar)
+                return similar
         
-        # Clean up any accidental formatting
-        query = query.strip()
-        if query.startswith('"') and query.endswith('"'):
-            query = query[1:-1]
-        if query.startswith('```') or query.endswith('```'):
-            # Remove code fences if LLM added them
-            query = query.replace('```', '').strip()
+        pieces: List[str] = []
+        for chunk in client.chat.completions.create(**_completion_kwargs(model, payload)):
+            _collect_chunk(chunk, pieces)
         
+        query = _clean_query("".join(pieces))
+        _remember(cache_key, query, vec)
         return query
         
     except Exception as e:
-        # Fallback to simple query if LLM fails
-        product = query_json.get("product_name", "product")
-        specs = query_json.get("specs", {})
-        spec_str = " ".join(str(v) for v in list(specs.values())[:5])
-        return f"I want to buy {product} {spec_str}. Show USA-based authorized vendors only that ship from the USA. Include valid HTTPS purchase links and USD pricing."
+        return _fallback_query(query_json)
+
+
+async def agenerate_search_query_with_llm(
+    selection: Dict[str, Any],
+    *,
+    key: Optional[str] = None,
+    model: str = MODEL
+) -> str:
+    """
+    Async variant of generate_search_query_with_llm for concurrent fan-out.
+    
+    Shares the result and semantic caches with the sync path.
+    """
+    query_json = build_query_json_cached(selection)
+    if _can_template(query_json):
+        return _template_query(query_json)
+    payload = USER_PREAMBLE + _dumps_compact(query_json)
+    
+    cache_key = _result_cache_key(model, payload)
+    cached = _result_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    try:
+        client = _get_async_client(key)
+        
+        vec = await _aembed(client, payload) if SEMANTIC_CACHE_ENABLED else None
+        if vec is not None:
+            similar = _semantic_cache_lookup(vec)
+            if similar is not None:
+                _result_cache_put(cache_key, similar)
+                return similar
+        
+        pieces: List[str] = []
+        async for chunk in await client.chat.completions.create(**_completion_kwargs(model, payload)):
+            _collect_chunk(chunk, pieces)
+        
+        query = _clean_query("".join(pieces))
+        _remember(cache_key, query, vec)
+        return query
+        
+    except Exception as e:
+        return _fallback_query(query_json)
+
+
+async def agenerate_search_queries(
+    selections: List[Dict[str, Any]],
+    *,
+    key: Optional[str] = None,
+    model: str = MODEL,
+    concurrency: int = BATCH_CONCURRENCY
+) -> List[str]:
+    """
+    Build queries for many selections concurrently, at most `concurrency` in flight.
+    
+    Returns:
+        Queries in the same order as selections
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def build_one(selection: Dict[str, Any]) -> str:
+        async with semaphore:
+            return await agenerate_search_query_with_llm(selection, key=key, model=model)
+    
+    return list(await asyncio.gather(*(build_one(s) for s in selections)))
 
 
 # Backwards compatibility wrapper
@@ -359,4 +721,3 @@ def generate_natural_search_instruction(
     Calls the new LLM-based query builder.
     """
     return generate_search_query_with_llm(selection, key=key, model=model)
-
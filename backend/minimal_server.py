@@ -1,9 +1,23 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from simple_web_search import run_web_search
+from llm_search_query_builder import agenerate_search_queries, BATCH_CONCURRENCY
 
-app = FastAPI()
+# Blocking web searches run here so they never stall the event loop
+WEB_SEARCH_WORKERS = int(os.getenv("WEB_SEARCH_WORKERS", "8"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor = ThreadPoolExecutor(max_workers=WEB_SEARCH_WORKERS, thread_name_prefix="web-search")
+    asyncio.get_running_loop().set_default_executor(executor)
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/health")
 async def health():
@@ -18,7 +32,7 @@ async def vendor_finder(req: Request):
         title = selected_variant.get("title", "")
         generated_query = f"i want the best {title} with links with 10 vendors"
 
-    output_text = run_web_search(generated_query)
+    output_text = await asyncio.to_thread(run_web_search, generated_query)
 
     return JSONResponse({
         "query": generated_query,
@@ -26,4 +40,22 @@ async def vendor_finder(req: Request):
         "results": []
     })
 
+@app.post("/api/vendor_finder/batch")
+async def vendor_finder_batch(req: Request):
+    body = await req.json()
+    selections = body.get("selections", [])
+
+    # Build all missing queries concurrently, then fan out the web searches
+    pending = [s for s in selections if not s.get("generated_query")]
+    built = iter(await agenerate_search_queries(pending))
+    queries = [s.get("generated_query") or next(built) for s in selections]
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def search_one(query: str) -> dict:
+        async with semaphore:
+            output_text = await asyncio.to_thread(run_web_search, query)
+        return {"query": query, "output_text": output_text, "results": []}
 
+    results = await asyncio.gather(*(search_one(q) for q in queries))
+    return JSONResponse({"results": list(results)})
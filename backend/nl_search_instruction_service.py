@@ -4,14 +4,206 @@
 # The query includes constant constraints (USA vendors, HTTPS, in-stock, delivery) + variable product specs
 
 from __future__ import annotations
-import os, json
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import os, re, sys, json, asyncio, hashlib, threading
+from collections import OrderedDict
+from functools import lru_cache
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 MODEL = os.getenv("OPENAI_MODEL_QUERY", "gpt-4o-2024-08-06")
 
+# __slots__ dataclasses need 3.10+; older interpreters fall back to a __dict__
+_DATACLASS_OPTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def _stringify_metrics(metrics: Dict[str, Any]) -> Dict[str, str]:
+    """Pre-stringify metric values once (keys interned when they are str)."""
+    return {
+        (sys.intern(k) if type(k) is str else k): str(v)
+        for k, v in metrics.items()
+    }
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTS)
+class Location:
+    city: str = "Wichita"  # Default to Wichita, KS
+    state: str = "KS"
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTS)
+class Variant:
+    summary: str = ""
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    must: List[Any] = field(default_factory=list)
+    should: List[Any] = field(default_factory=list)
+    nice: List[Any] = field(default_factory=list)
+    quantity: int = 1
+    est_unit_price_usd: Optional[float] = None
+    # str() of each metric value (interned keys), computed once and shared by
+    # every formatter that reads this variant
+    metric_strs: Dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Payloads may carry "metrics": null
+        if self.metrics is None:
+            object.__setattr__(self, "metrics", {})
+        object.__setattr__(self, "metric_strs", _stringify_metrics(self.metrics))
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTS)
+class Selection:
+    """Typed view of the selection payload; defaults mirror the frontend contract."""
+    product_name: str = "product"
+    product_category: str = ""
+    product_purpose: str = ""  # Why they need it
+    selected_variant: Variant = field(default_factory=Variant)
+    delivery_window_days: int = 30
+    delivery_location: Location = field(default_factory=Location)
+    results_limit: int = 20
+    budget_total_usd: float = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Selection":
+        """Build from the raw selection dict, applying the same defaults as before."""
+        get = data.get
+        variant = get("selected_variant", {})
+        vget = variant.get
+        location = get("delivery_location", {})
+        return cls(
+            product_name=get("product_name", "product"),
+            product_category=get("product_category", ""),
+            product_purpose=get("product_purpose", ""),
+            selected_variant=Variant(
+                summary=vget("summary", ""),
+                metrics=vget("metrics", {}),
+                must=vget("must", []),
+                should=vget("should", []),
+                nice=vget("nice", []),
+                quantity=vget("quantity", 1),
+                est_unit_price_usd=vget("est_unit_price_usd"),
+            ),
+            delivery_window_days=get("delivery_window_days", 30),
+            delivery_location=Location(
+                city=location.get("city", "Wichita"),
+                state=location.get("state", "KS"),
+            ),
+            results_limit=get("results_limit", 20),
+            budget_total_usd=get("budget_total_usd", 0),
+        )
+
+# Constant vendor / output / quality blocks, kept in prompts/ so the prompt text
+# can be reviewed and edited without touching code. They lead the instruction so
+# every instruction starts with the same fixed text; per-selection values
+# (delivery, counts) go in the tail.
+STATIC_PREFIX_FILE = Path(__file__).parent / "prompts" / "search_instruction_prefix.txt"
+_STATIC_PREFIX = STATIC_PREFIX_FILE.read_text(encoding="utf-8").rstrip("\n")
+
+# Spaces before "." / "," and runs of spaces, cleaned in one pass
+_CLEAN_RE = re.compile(r" +([.,])| {2,}")
+
+# Metric values treated as missing
+_SKIP_VALUES = frozenset({"", "none", "n/a", "null"})
+
+
+def _fmt_spec_number(key: str, value: Any) -> str:
+    return f"{key} must be {value}"
+
+
+def _fmt_spec_text(key: str, value: Any) -> str:
+    return f"{key} should be {value}"
+
+
+def _format_specs_generic(metrics: Dict[str, Any], metric_strs: Dict[str, str]) -> List[str]:
+    """Format every non-empty metric ("<key> must be <n>" for numbers, "should be" otherwise)."""
+    spec_details = []
+    spec_append = spec_details.append
+    for key, value in metrics.items():
+        text = metric_strs[key]
+        if value and text.lower() not in _SKIP_VALUES:
+            # Format clearly with units: numbers are hard requirements
+            spec_append(_SPEC_FORMATTERS.get(type(value), _fmt_spec_text)(key, text))
+    return spec_details
+
+
+# Spec formatters generated per metrics schema (ordered keys + value types).
+# Recommendations for one product category share a schema, so the generated
+# function inlines the keys and verbs and skips the per-item type dispatch.
+_SPECIALIZED_SPEC_FORMATTERS: Dict[tuple, Any] = {}
+_MAX_SPECIALIZED_SCHEMAS = 128
+_MAX_SPECIALIZED_KEYS = 64
+
+
+def _compile_spec_formatter(schema: tuple):
+    """Generate and compile a formatter equivalent to _format_specs_generic for one schema."""
+    lines = ["def _format_specs(metrics, metric_strs):", "    out = []", "    append = out.append"]
+    for i, (key, value_type) in enumerate(schema):
+        formatter = _SPEC_FORMATTERS.get(value_type, _fmt_spec_text)
+        prefix = formatter(key, "")  # "<key> must be " / "<key> should be "
+        lines.append(f"    s{i} = metric_strs[{key!r}]")
+        lines.append(f"    if metrics[{key!r}] and s{i}.lower() not in _SKIP_VALUES: append({prefix!r} + s{i})")
+    lines.append("    return out")
+    namespace = {"_SKIP_VALUES": _SKIP_VALUES}
+    exec(compile("\n".join(lines), "<spec-formatter>", "exec"), namespace)
+    return namespace["_format_specs"]
+
+
+def _spec_formatter_for(metrics: Dict[str, Any]):
+    """Specialized formatter for this metrics schema, or the generic one if not specializable."""
+    if len(metrics) > _MAX_SPECIALIZED_KEYS or not all(type(k) is str for k in metrics):
+        return _format_specs_generic
+    schema = tuple((k, type(v)) for k, v in metrics.items())
+    formatter = _SPECIALIZED_SPEC_FORMATTERS.get(schema)
+    if formatter is None:
+        if len(_SPECIALIZED_SPEC_FORMATTERS) >= _MAX_SPECIALIZED_SCHEMAS:
+            _SPECIALIZED_SPEC_FORMATTERS.clear()
+        formatter = _SPECIALIZED_SPEC_FORMATTERS[schema] = _compile_spec_formatter(schema)
+    return formatter
+
+
+@lru_cache(maxsize=256)
+def _format_budget(budget_per_unit: float, quantity: int) -> str:
+    """Budget sentence; memoized since the same budget/quantity pairs recur across selections."""
+    return f"Budget per unit: ${budget_per_unit:,.2f} USD. Total budget: ${budget_per_unit * quantity:,.2f} USD. "
+
+
+def _format_constraints(items: list, with_value: str, key_only: str, plain: str) -> list:
+    """
+    Format MUST/SHOULD/NICE constraints.
+    
+    Dict items ({"key", "value"}) use `with_value` ({k}, {v}) when they have a
+    value, else `key_only` ({k}); non-empty strings use `plain` ({c}).
+    """
+    out = []
+    for c in items:
+        if isinstance(c, dict):
+            k = c.get("key", "")
+            v = c.get("value", "")
+            if v:
+                out.append(with_value.format(k=k, v=v))
+            elif k:
+                out.append(key_only.format(k=k))
+        elif isinstance(c, str) and c:
+            out.append(plain.format(c=c))
+    return out
+
+
+# Exact-type dispatch for metric formatting (bool included: it is an int subclass)
+_SPEC_FORMATTERS = {int: _fmt_spec_number, float: _fmt_spec_number, bool: _fmt_spec_number}
+
+# Memo of built instructions keyed by _selection_key digests
+_INSTRUCTION_CACHE_SIZE = 1024
+_instruction_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_instruction_cache_lock = threading.Lock()
+
 def generate_natural_search_instruction(
-    selection: Dict[str, Any],
+    selection: Union[Selection, Dict[str, Any]],
     *,
     key: Optional[str] = None,
     model: str = MODEL
@@ -37,204 +229,187 @@ def generate_natural_search_instruction(
     - ALL strong preferences (should-have features)
     - Nice-to-have features for bonus consideration
     
+    `selection` may be a raw selection dict or an already-validated Selection.
+    
     Returns: Very detailed natural language instruction string (500-1000 words typical)
     """
+    cache_key = _selection_key(selection)
+    with _instruction_cache_lock:
+        instruction = _instruction_cache.get(cache_key)
+        if instruction is not None:
+            _instruction_cache.move_to_end(cache_key)
+            return instruction
+    
+    instruction = _build_instruction(selection)
+    with _instruction_cache_lock:
+        _instruction_cache[cache_key] = instruction
+        while len(_instruction_cache) > _INSTRUCTION_CACHE_SIZE:
+            _instruction_cache.popitem(last=False)
+    return instruction
+
+
+def generate_natural_search_instructions_batch(selections: List[Union[Selection, Dict[str, Any]]]) -> List[str]:
+    """
+    Build instructions for many selections in one call.
+    
+    Shares the module-level static prefix and the instruction memo, so
+    duplicate selections within (or across) batches are only built once.
+    
+    Returns: Instructions in the same order as selections
+    """
+    build = generate_natural_search_instruction
+    return [build(selection) for selection in selections]
+
+
+async def agenerate_natural_search_instructions_batch(selections: List[Union[Selection, Dict[str, Any]]]) -> List[str]:
+    """Async variant of the batch builder; runs in a worker thread to keep the event loop free."""
+    return await asyncio.to_thread(generate_natural_search_instructions_batch, selections)
+
+
+def _selection_key(selection: Union[Selection, Dict[str, Any]]) -> bytes:
+    """16-byte digest of the selection JSON (orjson when available).
+    
+    Insertion order is kept (no key sorting): metric/constraint order shows up
+    in the output, so only truly identical selections may share an entry.
+    """
+    if ORJSON_AVAILABLE:
+        raw = orjson.dumps(selection, default=str, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        raw = json.dumps(selection, default=str).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _instruction_cache_clear() -> None:
+    with _instruction_cache_lock:
+        _instruction_cache.clear()
+
+
+# Allow callers/tests to reset the memo via the public function
+generate_natural_search_instruction.cache_clear = _instruction_cache_clear
+
+
+def _build_instruction(selection: Union[Selection, Dict[str, Any]]) -> str:
+    """Uncached instruction builder; see generate_natural_search_instruction."""
+    if not isinstance(selection, Selection):
+        selection = Selection.from_dict(selection)
     
     # Extract ALL data from selection
-    product_name = selection.get("product_name", "product")
-    product_category = selection.get("product_category", "")
-    product_purpose = selection.get("product_purpose", "")  # Why they need it
-    
-    variant = selection.get("selected_variant", {})
-    variant_summary = variant.get("summary", "")
-    metrics = variant.get("metrics", {})
-    must_constraints = variant.get("must", [])
-    should_constraints = variant.get("should", [])
-    nice_constraints = variant.get("nice", [])
-    quantity = variant.get("quantity", 1)
-    budget_per_unit = variant.get("est_unit_price_usd", selection.get("budget_total_usd", 0))
+    product_name = selection.product_name
+    product_category = selection.product_category
+    product_purpose = selection.product_purpose
+    
+    variant = selection.selected_variant
+    variant_summary = variant.summary
+    metrics = variant.metrics
+    must_constraints = variant.must
+    should_constraints = variant.should
+    nice_constraints = variant.nice
+    quantity = variant.quantity
+    budget_per_unit = variant.est_unit_price_usd
+    if budget_per_unit is None:
+        budget_per_unit = selection.budget_total_usd
     
     # Delivery information (from product details in app)
-    delivery_window = selection.get("delivery_window_days", 30)
-    delivery_loc = selection.get("delivery_location", {})
-    city = delivery_loc.get("city", "Wichita")  # Default to Wichita, KS
-    state = delivery_loc.get("state", "KS")
+    delivery_window = selection.delivery_window_days
+    city = selection.delivery_location.city
+    state = selection.delivery_location.state
     
     # Results limit
-    results_limit = selection.get("results_limit", 20)
+    results_limit = selection.results_limit
     
-    # Build very detailed, comprehensive instruction
-    parts = []
+    # Each optional section renders to "" when absent, then one f-string
+    # assembles the instruction: static prefix first, selection-specific tail after
     
-    # 1. Start with detailed purchase intent and purpose
+    # 1. Detailed purchase intent and purpose
     intro = f"I want to buy {product_name}"
-    
-    # Add product purpose/domain context if available
     if product_purpose:
         intro += f" for {product_purpose}"
     elif variant_summary:
         intro += f" ({variant_summary})"
-    
-    # Add category context if available
     if product_category:
         intro += f" in the {product_category} category"
     
-    parts.append(intro + ".")
+    # 2. Detailed product description and use case
+    description = f"Product description: {variant_summary}. " if variant_summary and not product_purpose else ""
     
-    # 2. Add detailed product description and use case
-    if variant_summary and not product_purpose:
-        parts.append(f"Product description: {variant_summary}.")
-    
-    # 3. Add COMPLETE specifications section with ALL metrics
+    # 3. COMPLETE specifications section with ALL metrics
+    specs = ""
     if metrics:
-        parts.append("Technical specifications required:")
-        
-        spec_details = []
-        for key, value in metrics.items():
-            if value and str(value).lower() not in ["", "none", "n/a", "null"]:
-                # Format clearly with units
-                if isinstance(value, (int, float)):
-                    spec_details.append(f"{key} must be {value}")
-                else:
-                    spec_details.append(f"{key} should be {value}")
-        
-        if spec_details:
-            parts.append("; ".join(spec_details) + ".")
-    
-    # 4. Add CRITICAL MANDATORY requirements (MUST constraints)
+        spec_details = _spec_formatter_for(metrics)(metrics, variant.metric_strs)
+        specs = "Technical specifications required: " + (f"{'; '.join(spec_details)}. " if spec_details else "")
+    
+    # 4. CRITICAL MANDATORY requirements (MUST constraints)
+    musts = ""
     if must_constraints:
-        parts.append("CRITICAL MANDATORY REQUIREMENTS (non-negotiable):")
-        
-        must_details = []
-        for constraint in must_constraints:
-            if isinstance(constraint, dict):
-                key_val = constraint.get("key", "")
-                value_val = constraint.get("value", "")
-                if value_val:
-                    must_details.append(f"The product MUST {value_val}")
-                elif key_val:
-                    must_details.append(f"Must meet {key_val} requirement")
-            elif isinstance(constraint, str) and constraint:
-                must_details.append(f"Must have {constraint}")
-        
-        if must_details:
-            parts.append(" ".join(must_details) + ".")
-    
-    # 5. Add STRONG PREFERENCES (should-have features)
+        must_details = _format_constraints(
+            must_constraints, "The product MUST {v}", "Must meet {k} requirement", "Must have {c}"
+        )
+        musts = "CRITICAL MANDATORY REQUIREMENTS (non-negotiable): " + (f"{' '.join(must_details)}. " if must_details else "")
+    
+    # 5. STRONG PREFERENCES (should-have features)
+    shoulds = ""
     if should_constraints:
-        parts.append("STRONG PREFERENCES (highly desired features):")
-        
-        should_details = []
-        for constraint in should_constraints:
-            if isinstance(constraint, dict):
-                key_val = constraint.get("key", "")
-                value_val = constraint.get("value", "")
-                if value_val:
-                    should_details.append(f"Strongly prefer {key_val}: {value_val}")
-                elif key_val:
-                    should_details.append(f"Prefer {key_val}")
-            elif isinstance(constraint, str) and constraint:
-                should_details.append(f"Prefer {constraint}")
-        
-        if should_details:
-            parts.append("; ".join(should_details) + ".")
-    
-    # 6. Add NICE-TO-HAVE features (bonus considerations)
+        should_details = _format_constraints(
+            should_constraints, "Strongly prefer {k}: {v}", "Prefer {k}", "Prefer {c}"
+        )
+        shoulds = "STRONG PREFERENCES (highly desired features): " + (f"{'; '.join(should_details)}. " if should_details else "")
+    
+    # 6. NICE-TO-HAVE features (bonus considerations)
+    nices = ""
     if nice_constraints:
-        nice_parts = []
-        for constraint in nice_constraints:
-            if isinstance(constraint, dict):
-                key_val = constraint.get("key", "")
-                value_val = constraint.get("value", "")
-                if value_val:
-                    nice_parts.append(f"{key_val}: {value_val}")
-                elif key_val:
-                    nice_parts.append(key_val)
-            elif isinstance(constraint, str) and constraint:
-                nice_parts.append(constraint)
-        
+        nice_parts = _format_constraints(nice_constraints, "{k}: {v}", "{k}", "{c}")
         if nice_parts:
-            parts.append(f"BONUS FEATURES (nice to have, not required): {', '.join(nice_parts)}.")
-    
-    # 7. MANDATORY VENDOR CONSTRAINTS (always enforced)
-    parts.append("\nVENDOR REQUIREMENTS (strictly enforced):")
-    parts.append("I need vendors that meet ALL of the following criteria:")
-    
-    vendor_requirements = []
-    vendor_requirements.append("1) USA-based authorized vendors ONLY - no international sellers")
-    vendor_requirements.append("2) Must ship products from USA warehouses/facilities (not dropship from overseas)")
-    vendor_requirements.append("3) Must be authorized distributors or manufacturers (no gray market)")
-    vendor_requirements.append("4) Must provide valid, working HTTPS purchase links (no HTTP or broken links)")
-    vendor_requirements.append("5) Must accept USD pricing (no foreign currency conversions required)")
-    vendor_requirements.append(f"6) Product must be IN STOCK with immediate availability OR firm lead time ≤ {delivery_window} days (no estimates or 'call for availability')")
-    vendor_requirements.append(f"7) Must be able to deliver to {city}, {state} within {delivery_window} days from order")
-    vendor_requirements.append("8) Must have clear contact information (phone, email, or chat support)")
-    vendor_requirements.append("9) Must display pricing publicly or provide instant quote capability")
-    vendor_requirements.append("10) Prefer vendors with government/enterprise purchasing programs")
-    
-    parts.append(" ".join(vendor_requirements))
-    
-    # 8. Quantity and budget constraints
-    parts.append(f"\nQUANTITY & BUDGET: I need to purchase {quantity} unit(s).")
-    if budget_per_unit > 0:
-        parts.append(f"Budget per unit: ${budget_per_unit:,.2f} USD.")
-        total_budget = budget_per_unit * quantity
-        parts.append(f"Total budget: ${total_budget:,.2f} USD.")
-    
-    # 9. Delivery specifics
-    parts.append(f"\nDELIVERY REQUIREMENTS:")
-    parts.append(f"Ship to: {city}, {state}.")
-    parts.append(f"Required delivery window: {delivery_window} days or less from order placement.")
-    parts.append("Shipping method: Vendor's choice (ground, air, freight) as long as delivery window is met.")
-    parts.append("Include shipping costs in pricing if possible, or note them separately.")
-    
-    # 10. Output format instructions
-    parts.append(f"\nOUTPUT FORMAT: Return exactly {results_limit} vendor options, ranked by best overall match.")
-    parts.append("For each vendor, include:")
-    parts.append("- Vendor name and location")
-    parts.append("- Direct HTTPS purchase link")
-    parts.append("- Exact unit price in USD")
-    parts.append("- Total price for requested quantity")
-    parts.append("- Current stock status or specific lead time")
-    parts.append("- Shipping time to delivery location")
-    parts.append("- Contact method (phone/email/chat)")
-    parts.append("- Any relevant compliance certifications")
-    
-    # 11. Search quality instructions
-    parts.append("\nSEARCH QUALITY: Prioritize vendors with:")
-    parts.append("- Exact spec matches over partial matches")
-    parts.append("- In-stock availability over backorder")
-    parts.append("- Faster delivery times")
-    parts.append("- Better pricing (closer to budget)")
-    parts.append("- Established reputation (enterprise/government sales)")
-    parts.append("- Complete product information and documentation")
-    
-    # Join all parts into one natural paragraph
-    instruction = " ".join(parts)
+            nices = f"BONUS FEATURES (nice to have, not required): {', '.join(nice_parts)}. "
+    
+    # 7. Budget constraints
+    budget = _format_budget(budget_per_unit, quantity) if budget_per_unit > 0 else ""
+    
+    instruction = (
+        f"{_STATIC_PREFIX} \nPURCHASE REQUEST: {intro}. {description}{specs}{musts}{shoulds}{nices}"
+        f"\nQUANTITY & BUDGET: I need to purchase {quantity} unit(s). {budget}"
+        # 8. Delivery specifics
+        f"\nDELIVERY REQUIREMENTS: Ship to: {city}, {state}. "
+        f"Required delivery window: {delivery_window} days or less from order placement. "
+        "Shipping method: Vendor's choice (ground, air, freight). "
+        "Include shipping costs in pricing if possible, or note them separately. "
+        # 9. Requested result count
+        f"\nRESULTS: Return exactly {results_limit} vendor options."
+    )
     
     # Clean up spacing around punctuation
-    instruction = instruction.replace(" .", ".").replace(" ,", ",")
-    instruction = instruction.replace("  ", " ")
+    instruction = _CLEAN_RE.sub(lambda m: m.group(1) or " ", instruction)
     
     return instruction.strip()
 
 
-def generate_short_query(selection: Dict[str, Any]) -> str:
+SHORT_QUERY_MAX_LEN = 100
+
+
+def generate_short_query(selection: Union[Selection, Dict[str, Any]]) -> str:
     """
     Generate a short keyword query (for logging/display purposes).
     This is optional - just for debugging/logs.
+    
+    Passing the same Selection used for the full instruction reuses its
+    pre-stringified metric values.
     """
-    product_name = selection.get("product_name", "")
-    variant = selection.get("selected_variant", {})
-    metrics = variant.get("metrics", {})
+    if isinstance(selection, Selection):
+        product_name = selection.product_name
+        metrics = selection.selected_variant.metrics
+        metric_strs = selection.selected_variant.metric_strs
+    else:
+        product_name = selection.get("product_name", "")
+        metrics = selection.get("selected_variant", {}).get("metrics", {})
+        metric_strs = None
     
-    # Take first 3-4 key metrics
-    keywords = [product_name]
-    for key, value in list(metrics.items())[:4]:
-        if isinstance(value, (int, float)):
-            keywords.append(f"{value}{key[:4]}")
-        else:
-            keywords.append(str(value))
+    # Take first 3-4 key metrics, stopping before a keyword would cross the limit
+    # (so the query is never cut mid-keyword)
+    query = product_name[:SHORT_QUERY_MAX_LEN]
+    for key, value in islice(metrics.items(), 4):
+        text = metric_strs[key] if metric_strs is not None else str(value)
+        piece = f" {text}{key[:4]}" if isinstance(value, (int, float)) else f" {text}"
+        if len(query) + len(piece) > SHORT_QUERY_MAX_LEN:
+            break
+        query += piece
     
-    return " ".join(keywords)[:100]
-
+    return query
@@ -4,16 +4,128 @@ Post-Cart Phase Service
 Handles G1 decision gate evaluation, PR creation, RFQ management, and approval workflows
 """
 
+import copy
+import hashlib
+import io
+import itertools
 import json
 import logging
+import operator
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Deque, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field, fields, is_dataclass
 from enum import Enum
+from functools import lru_cache
 import uuid
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# __slots__ dataclasses (3.10+) drop the per-instance __dict__; carts build
+# thousands of LineItems per evaluation
+_DATACLASS_OPTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# PR/RFQ ids: process prefix + monotonic counter by default (cheap, sortable);
+# set POST_CART_RANDOM_IDS=1 for the old timestamp + uuid4 ids when ids must
+# be unguessable
+RANDOM_IDS = os.getenv("POST_CART_RANDOM_IDS", "").lower() in ("1", "true", "yes")
+_ID_PREFIX = f"{int(time.time())}-{os.getpid():x}-"
+_id_counter = itertools.count(1)
+
+def _next_id(kind: str, now: datetime) -> str:
+    """New PR/RFQ id, unique within the process and across processes by pid + start time."""
+    if RANDOM_IDS:
+        return f"{kind}-{now.strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8]}"
+    return f"{kind}-{_ID_PREFIX}{next(_id_counter):08x}"
+
+# Audit entries kept as objects per PR/RFQ; older ones are archived as tuples
+AUDIT_MAXLEN = 256
+
+# G1 reason codes, interned so membership checks can short-circuit on identity
+MISSING_PRICE = sys.intern('MISSING_PRICE')
+INVALID_PRICE = sys.intern('INVALID_PRICE')
+MISSING_CURRENCY = sys.intern('MISSING_CURRENCY')
+MISSING_LEAD_TIME = sys.intern('MISSING_LEAD_TIME')
+MISSING_DELIVERY_TERMS = sys.intern('MISSING_DELIVERY_TERMS')
+MISSING_QUOTE_VALIDITY = sys.intern('MISSING_QUOTE_VALIDITY')
+INSUFFICIENT_EVIDENCE = sys.intern('INSUFFICIENT_EVIDENCE')
+INSUFFICIENT_SPECS = sys.intern('INSUFFICIENT_SPECS')
+SOLE_SOURCE_JUST_REQUIRED = sys.intern('SOLE_SOURCE_JUST_REQUIRED')
+CONTRACT_REQUIRED = sys.intern('CONTRACT_REQUIRED')
+UNBUDGETED_PROCUREMENT = sys.intern('UNBUDGETED_PROCUREMENT')
+
+# Quote-line field checks, in reporting order: (validity bit, reason code)
+PRICING_FAIL_TABLE = (
+    (0b00001, INVALID_PRICE),
+    (0b00010, MISSING_CURRENCY),
+    (0b00100, MISSING_LEAD_TIME),
+    (0b01000, MISSING_DELIVERY_TERMS),
+    (0b10000, MISSING_QUOTE_VALIDITY),
+)
+PRICING_FIELDS_VALID = 0b11111
+
+# C-level field extractors for the pricing loop (one call instead of several attribute loads)
+_item_get = operator.attrgetter('sku', 'desc')
+_vi_get = operator.attrgetter('unitPrice', 'currency', 'leadDays', 'deliveryTerms', 'quoteValidity')
+
+# Pricing gap message templates, keyed by MissingItem.kind
+_MISSING_ITEM_TEMPLATES = {
+    'NO_PRICING': "No pricing available for {vendor}",
+    MISSING_PRICE: "Missing price for {desc} from {vendor}",
+    INVALID_PRICE: "Invalid unit price for {desc} from {vendor}",
+    MISSING_CURRENCY: "Missing currency for {desc} from {vendor}",
+    MISSING_LEAD_TIME: "Missing lead time for {desc} from {vendor}",
+    MISSING_DELIVERY_TERMS: "Missing delivery terms for {desc} from {vendor}",
+    MISSING_QUOTE_VALIDITY: "Missing quote validity for {desc} from {vendor}",
+}
+
+class MissingItem(namedtuple('MissingItem', ['kind', 'desc', 'vendor'])):
+    """A pricing gap, rendered to its message only when str() is taken."""
+    
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return _MISSING_ITEM_TEMPLATES[self.kind].format_map(self._asdict())
+
+# Approval thresholds (USD). These are the source of truth;
+# G1RuleEngine.PRICING_THRESHOLDS mirrors them for introspection.
+_CC_PMO = 5000
+_CC_FIN = 5000
+_PROC_PRES = 250000
+_ROMS_FIN = 250000
+_ROMS_PRES = 500000
+_SSJ_CON = 250000
+
+# Reason codes behind each checklist row
+_PRICING_CODES = frozenset({
+    MISSING_PRICE, INVALID_PRICE, MISSING_CURRENCY, MISSING_LEAD_TIME,
+    MISSING_DELIVERY_TERMS, MISSING_QUOTE_VALIDITY,
+})
+_DOC_CODES = frozenset({INSUFFICIENT_EVIDENCE, INSUFFICIENT_SPECS})
+_BIZ_CODES = frozenset({SOLE_SOURCE_JUST_REQUIRED, CONTRACT_REQUIRED, UNBUDGETED_PROCUREMENT})
+
+# Max G1 decisions kept per service; UIs re-submit unchanged carts during form edits
+G1_CACHE_SIZE = 512
+
 class ApproverRole(Enum):
     PMO = "PMO"
     EVP = "EVP"
@@ -29,7 +141,7 @@ class ProcurementType(Enum):
     BIDS_AND_PROPOSALS = "BIDS_AND_PROPOSALS"
     ROMS = "ROMS"
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class LineItem:
     sku: str
     desc: str
@@ -41,14 +153,18 @@ class LineItem:
     deliveryTerms: Optional[str] = None
     quoteValidity: Optional[str] = None
 
-@dataclass
+# Read-only stand-in for LineItem on the G1 evaluation path: same fields and
+# defaults, but a tuple is far cheaper to build than a dataclass per quote line
+LineItemNT = namedtuple('LineItemNT', [f.name for f in fields(LineItem)], defaults=(None, None))
+
+@dataclass(**_DATACLASS_OPTS)
 class VendorRef:
     id: str
     name: str
     contact: str
     website: Optional[str] = None
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class DocRef:
     type: str  # 'Quote' | 'RFQ' | 'Comparison' | 'SSJ' | 'CoverSheet' | 'Spec' | 'Other'
     url: str
@@ -56,20 +172,20 @@ class DocRef:
     hash: str
     uploadedAt: str
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class Justification:
     type: str  # 'SSJ' | 'Budgeted' | 'Technical' | 'Other'
     text: Optional[str] = None
     amount: Optional[float] = None
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class ApproverAssignment:
     role: str
     userId: str
     name: str
     email: str
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class ApproverDecision:
     role: str
     userId: str
@@ -77,13 +193,13 @@ class ApproverDecision:
     timestamp: str
     comment: Optional[str] = None
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class ApprovalRoute:
     required: List[str]
     roster: List[ApproverAssignment]
     decisions: List[ApproverDecision]
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class AuditEntry:
     actor: str
     action: str
@@ -91,8 +207,86 @@ class AuditEntry:
     delta: Optional[Dict[str, Any]] = None
     reason: Optional[str] = None
 
-@dataclass
-class PR:
+# dataclass -> field names, so asdict-style walks don't re-introspect fields()
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+def _field_names(cls: type) -> Tuple[str, ...]:
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls))
+    return names
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+def _plain(value: Any) -> Any:
+    """Convert a record field value into plain JSON-ready data."""
+    if isinstance(value, _SCALAR_TYPES):
+        return value
+    if type(value) in _FIELD_NAMES or is_dataclass(value):
+        return fast_asdict(value)
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_plain(v) for v in value)
+    if isinstance(value, deque):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return copy.deepcopy(value)
+
+def fast_asdict(obj: Any) -> Dict[str, Any]:
+    """asdict() replacement using cached field names and no per-leaf deepcopy.
+    
+    PRs and RFQs go through their to_dict() so the audit archive is merged.
+    """
+    if isinstance(obj, _AuditedRecord):
+        return obj.to_dict()
+    return {name: _plain(getattr(obj, name)) for name in _field_names(type(obj))}
+
+class _AuditedRecord:
+    """Bounded audit trail shared by PR and RFQ.
+    
+    ``audit`` is a deque of the latest AUDIT_MAXLEN entries; entries pushed
+    out of it are kept in ``_audit_archive`` as compact
+    ``(actor, action, timestamp, delta_json, reason)`` tuples.
+    """
+    
+    __slots__ = ()
+
+    def record_audit(self, entry: AuditEntry) -> None:
+        """Append an audit entry, archiving the oldest one when the deque is full."""
+        audit = self.audit
+        if audit.maxlen is not None and len(audit) == audit.maxlen:
+            old = audit[0]
+            delta_json = json.dumps(old.delta, default=str) if old.delta is not None else None
+            self._audit_archive.append((old.actor, old.action, old.timestamp, delta_json, old.reason))
+        audit.append(entry)
+
+    def audit_dicts(self) -> List[Dict[str, Any]]:
+        """Full audit trail, oldest first, as plain dicts."""
+        archived = [
+            {
+                'actor': actor,
+                'action': action,
+                'timestamp': timestamp,
+                'delta': json.loads(delta_json) if delta_json is not None else None,
+                'reason': reason,
+            }
+            for actor, action, timestamp, delta_json, reason in self._audit_archive
+        ]
+        return archived + [fast_asdict(entry) for entry in self.audit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form of the record (use instead of asdict())."""
+        result = {}
+        for name in _field_names(type(self)):
+            if name == '_audit_archive':
+                continue
+            result[name] = self.audit_dicts() if name == 'audit' else _plain(getattr(self, name))
+        return result
+
+@dataclass(**_DATACLASS_OPTS)
+class PR(_AuditedRecord):
     id: str
     projectKeys: List[str]
     spendType: str  # 'Direct' | 'Indirect'
@@ -105,11 +299,12 @@ class PR:
     documents: List[DocRef]
     approvals: ApprovalRoute
     status: str  # 'PR_DRAFT' | 'PR_SUBMITTED' | 'APPROVALS_IN_FLIGHT' | 'APPROVED' | 'PO_ISSUED' | 'REWORK'
-    audit: List[AuditEntry]
+    audit: Deque[AuditEntry]
     createdAt: str
     updatedAt: str
+    _audit_archive: List[tuple] = field(default_factory=list, init=False, repr=False, compare=False)
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class VendorRFQ:
     vendorId: str
     vendorName: str
@@ -118,25 +313,26 @@ class VendorRFQ:
     sentAt: Optional[str] = None
     receivedAt: Optional[str] = None
 
-@dataclass
-class RFQ:
+@dataclass(**_DATACLASS_OPTS)
+class RFQ(_AuditedRecord):
     id: str
     prCandidateId: Optional[str]
     vendors: List[VendorRFQ]
     dueDate: str
     status: str  # 'RFQ_PREP' | 'RFQ_SENT' | 'RFQ_RESPONSES' | 'VENDOR_EVAL' | 'SELECTION_FINALIZED'
-    audit: List[AuditEntry]
+    audit: Deque[AuditEntry]
     createdAt: str
     updatedAt: str
+    _audit_archive: List[tuple] = field(default_factory=list, init=False, repr=False, compare=False)
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class G1Context:
     selectedVendors: List[Dict[str, Any]]
     items: List[LineItem]
     pricing: Dict[str, List[LineItem]]
     procurementContext: Dict[str, Any]
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class G1Result:
     passed: bool
     reasonCodes: List[str]
@@ -144,7 +340,7 @@ class G1Result:
     recommendations: List[str]
     requiredApprovers: List[str]
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class ChecklistItem:
     id: str
     label: str
@@ -152,7 +348,7 @@ class ChecklistItem:
     message: Optional[str] = None
     required: bool = True
 
-@dataclass
+@dataclass(**_DATACLASS_OPTS)
 class CartDecision:
     recommendation: str  # 'PROCEED_TO_APPROVALS' | 'GENERATE_RFQS'
     reason: str
@@ -160,21 +356,143 @@ class CartDecision:
     readinessPercentage: float
     checklist: List[ChecklistItem]
 
+for _cls in (LineItem, VendorRef, DocRef, Justification, ApproverAssignment, ApproverDecision,
+             ApprovalRoute, AuditEntry, PR, VendorRFQ, RFQ, G1Context, G1Result, ChecklistItem, CartDecision):
+    _field_names(_cls)
+
+def _stream_json(value: Any, write) -> None:
+    """Write ``value`` as compact JSON tokens via ``write``.
+    
+    Dataclasses are walked field by field and containers element by element,
+    so no intermediate dict tree is built. PR/RFQ audit trails are written
+    archive first, then the live deque, skipping the archive field itself.
+    """
+    if is_dataclass(value) and not isinstance(value, type):
+        write(b'{')
+        first = True
+        for name in _field_names(type(value)):
+            if name == '_audit_archive':
+                continue
+            if not first:
+                write(b',')
+            first = False
+            write(json.dumps(name).encode('utf-8'))
+            write(b':')
+            if name == 'audit' and isinstance(value, _AuditedRecord):
+                _stream_audit(value, write)
+            else:
+                _stream_json(getattr(value, name), write)
+        write(b'}')
+    elif isinstance(value, dict):
+        write(b'{')
+        first = True
+        for k, v in value.items():
+            if not first:
+                write(b',')
+            first = False
+            write(json.dumps(k if isinstance(k, str) else str(k), ensure_ascii=False).encode('utf-8'))
+            write(b':')
+            _stream_json(v, write)
+        write(b'}')
+    elif isinstance(value, (list, tuple, deque)):
+        write(b'[')
+        first = True
+        for v in value:
+            if not first:
+                write(b',')
+            first = False
+            _stream_json(v, write)
+        write(b']')
+    else:
+        write(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+def _stream_audit(record: _AuditedRecord, write) -> None:
+    """Write a record's full audit trail (archived tuples, then live entries)."""
+    write(b'[')
+    first = True
+    for actor, action, timestamp, delta_json, reason in record._audit_archive:
+        if not first:
+            write(b',')
+        first = False
+        write(b'{"actor":')
+        _stream_json(actor, write)
+        write(b',"action":')
+        _stream_json(action, write)
+        write(b',"timestamp":')
+        _stream_json(timestamp, write)
+        # The archived delta is already JSON; splice it in without re-parsing
+        write(b',"delta":')
+        write(delta_json.encode('utf-8') if delta_json is not None else b'null')
+        write(b',"reason":')
+        _stream_json(reason, write)
+        write(b'}')
+    for entry in record.audit:
+        if not first:
+            write(b',')
+        first = False
+        _stream_json(entry, write)
+    write(b']')
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a dataclass (or plain dict) straight to JSON bytes.
+    
+    orjson walks dataclasses natively, so no intermediate asdict() tree is
+    built; without orjson the dataclass is streamed by _stream_json. PRs and
+    RFQs go through to_dict() with orjson so their archived audit entries are
+    included.
+    """
+    if ORJSON_AVAILABLE:
+        if isinstance(obj, _AuditedRecord):
+            obj = obj.to_dict()
+        return orjson.dumps(obj)
+    buf = io.BytesIO()
+    _stream_json(obj, buf.write)
+    return buf.getvalue()
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _readiness_kernel(required, passed):
+        """Per-row readiness percentage over (n_checklists, n_items) uint8 masks."""
+        n, m = required.shape
+        out = np.empty(n)
+        for i in prange(n):
+            req = 0
+            ok = 0
+            for j in range(m):
+                if required[i, j]:
+                    req += 1
+                    if passed[i, j]:
+                        ok += 1
+            out[i] = 100.0 * ok / req if req else 0.0
+        return out
+
+elif NUMPY_AVAILABLE:
+    def _readiness_kernel(required, passed):
+        """Per-row readiness percentage over (n_checklists, n_items) uint8 masks."""
+        req = required.sum(axis=1)
+        ok = (required & passed).sum(axis=1)
+        return np.where(req > 0, 100.0 * ok / np.maximum(req, 1), 0.0)
+
 class G1RuleEngine:
     """Decision Gate G1 Rule Engine for procurement readiness evaluation"""
     
+    # Read-only view of the module-level threshold constants
     PRICING_THRESHOLDS = {
-        'CC_PMO_THRESHOLD': 5000,
-        'CC_FINANCE_THRESHOLD': 5000,
-        'PROC_PRESIDENT_THRESHOLD': 250000,
-        'ROMS_FINANCE_THRESHOLD': 250000,
-        'ROMS_PRESIDENT_THRESHOLD': 500000,
-        'SSJ_CONTRACTS_THRESHOLD': 250000
+        'CC_PMO_THRESHOLD': _CC_PMO,
+        'CC_FINANCE_THRESHOLD': _CC_FIN,
+        'PROC_PRESIDENT_THRESHOLD': _PROC_PRES,
+        'ROMS_FINANCE_THRESHOLD': _ROMS_FIN,
+        'ROMS_PRESIDENT_THRESHOLD': _ROMS_PRES,
+        'SSJ_CONTRACTS_THRESHOLD': _SSJ_CON
     }
 
     @staticmethod
-    def evaluate(context: G1Context) -> G1Result:
-        """Main G1 evaluation function"""
+    def evaluate(context: G1Context, detailed: bool = True) -> G1Result:
+        """Main G1 evaluation function
+
+        With ``detailed=False`` the pricing check stops at the first gap, which
+        is enough for a pass/fail answer but lists only that one gap.
+        """
         selected_vendors = context.selectedVendors
         items = context.items
         pricing = context.pricing
@@ -186,7 +504,7 @@ class G1RuleEngine:
         required_approvers = []
 
         # 1. Pricing Completeness Check
-        pricing_check = G1RuleEngine._check_pricing_completeness(selected_vendors, items, pricing)
+        pricing_check = G1RuleEngine._check_pricing_completeness(selected_vendors, items, pricing, detailed)
         if not pricing_check['pass']:
             reason_codes.extend(pricing_check['reasonCodes'])
             missing_items.extend(pricing_check['missingItems'])
@@ -216,15 +534,15 @@ class G1RuleEngine:
         return G1Result(
             passed=pass_result,
             reasonCodes=reason_codes,
-            missingItems=missing_items,
+            missingItems=[str(item) for item in missing_items],
             recommendations=recommendations,
             requiredApprovers=required_approvers
         )
 
     @staticmethod
-    def generate_cart_decision(context: G1Context) -> CartDecision:
+    def generate_cart_decision(context: G1Context, detailed: bool = True) -> CartDecision:
         """Generate cart decision with checklist"""
-        g1_result = G1RuleEngine.evaluate(context)
+        g1_result = G1RuleEngine.evaluate(context, detailed)
         checklist = G1RuleEngine._generate_checklist(context, g1_result)
         readiness_percentage = G1RuleEngine._calculate_readiness_percentage(checklist)
         
@@ -243,8 +561,12 @@ class G1RuleEngine:
         )
 
     @staticmethod
-    def _check_pricing_completeness(vendors, items, pricing):
-        """Check pricing completeness for all selected vendors"""
+    def _check_pricing_completeness(vendors, items, pricing, detailed=True):
+        """Check pricing completeness for all selected vendors
+
+        ``missingItems`` holds MissingItem tuples; take str() of each for the message.
+        When ``detailed`` is False, returns as soon as the first gap is found.
+        """
         reason_codes = []
         missing_items = []
 
@@ -252,36 +574,51 @@ class G1RuleEngine:
             vendor_pricing = pricing.get(vendor['id'], [])
             
             if not vendor_pricing:
-                reason_codes.append('MISSING_PRICE')
-                missing_items.append(f"No pricing available for {vendor['name']}")
+                reason_codes.append(MISSING_PRICE)
+                missing_items.append(MissingItem('NO_PRICING', None, vendor['name']))
+                if not detailed:
+                    break
                 continue
 
+            # Index the vendor's quote lines by SKU once; iterate in reverse so
+            # the first line for a duplicated SKU wins, as a linear scan would
+            by_sku = {p.sku: p for p in reversed(vendor_pricing)}
+            vendor_name = vendor['name']
+
             for item in items:
-                vendor_item = next((p for p in vendor_pricing if p.sku == item.sku), None)
+                sku, desc = _item_get(item)
+                vendor_item = by_sku.get(sku)
                 if not vendor_item:
-                    reason_codes.append('MISSING_PRICE')
-                    missing_items.append(f"Missing price for {item.desc} from {vendor['name']}")
+                    reason_codes.append(MISSING_PRICE)
+                    missing_items.append(MissingItem(MISSING_PRICE, desc, vendor_name))
+                    if not detailed:
+                        break
                     continue
 
-                if not vendor_item.unitPrice or vendor_item.unitPrice <= 0:
-                    reason_codes.append('INVALID_PRICE')
-                    missing_items.append(f"Invalid unit price for {item.desc} from {vendor['name']}")
-
-                if not vendor_item.currency:
-                    reason_codes.append('MISSING_CURRENCY')
-                    missing_items.append(f"Missing currency for {item.desc} from {vendor['name']}")
-
-                if not vendor_item.leadDays or vendor_item.leadDays <= 0:
-                    reason_codes.append('MISSING_LEAD_TIME')
-                    missing_items.append(f"Missing lead time for {item.desc} from {vendor['name']}")
+                # One validity bit per quote field; only a line with a gap pays
+                # for building reason codes and messages
+                unit_price, currency, lead_days, delivery_terms, quote_validity = _vi_get(vendor_item)
+                mask = (
+                    bool(unit_price and unit_price > 0)
+                    | bool(currency) << 1
+                    | bool(lead_days and lead_days > 0) << 2
+                    | bool(delivery_terms) << 3
+                    | bool(quote_validity) << 4
+                )
+                if mask == PRICING_FIELDS_VALID:
+                    continue
 
-                if not vendor_item.deliveryTerms:
-                    reason_codes.append('MISSING_DELIVERY_TERMS')
-                    missing_items.append(f"Missing delivery terms for {item.desc} from {vendor['name']}")
+                for bit, code in PRICING_FAIL_TABLE:
+                    if not mask & bit:
+                        reason_codes.append(code)
+                        missing_items.append(MissingItem(code, desc, vendor_name))
+                        if not detailed:
+                            break
+                if not detailed:
+                    break
 
-                if not vendor_item.quoteValidity:
-                    reason_codes.append('MISSING_QUOTE_VALIDITY')
-                    missing_items.append(f"Missing quote validity for {item.desc} from {vendor['name']}")
+            if reason_codes and not detailed:
+                break
 
         return {
             'pass': len(reason_codes) == 0,
@@ -297,12 +634,12 @@ class G1RuleEngine:
 
         has_quote_evidence = any(v.get('contact') and v.get('website') for v in vendors)
         if not has_quote_evidence:
-            reason_codes.append('INSUFFICIENT_EVIDENCE')
+            reason_codes.append(INSUFFICIENT_EVIDENCE)
             missing_items.append('No quote evidence or vendor contact information')
 
         has_specs = any(item.desc and len(item.desc) > 10 for item in items)
         if not has_specs:
-            reason_codes.append('INSUFFICIENT_SPECS')
+            reason_codes.append(INSUFFICIENT_SPECS)
             missing_items.append('Insufficient product specifications')
 
         return {
@@ -318,15 +655,15 @@ class G1RuleEngine:
         recommendations = []
 
         if context.get('isSoleSource') and not context.get('ssjAmount'):
-            reason_codes.append('SOLE_SOURCE_JUST_REQUIRED')
+            reason_codes.append(SOLE_SOURCE_JUST_REQUIRED)
             recommendations.append('Sole source justification required for non-competitive procurement')
 
         if context.get('contractRequired') and not context.get('contractExecuted'):
-            reason_codes.append('CONTRACT_REQUIRED')
+            reason_codes.append(CONTRACT_REQUIRED)
             recommendations.append('Contract execution required before proceeding')
 
         if not context.get('budgeted') and context.get('spendPlanStatus') == 'NOT_IN_PLAN':
-            reason_codes.append('UNBUDGETED_PROCUREMENT')
+            reason_codes.append(UNBUDGETED_PROCUREMENT)
             recommendations.append('Unbudgeted procurement requires additional approvals')
 
         return {
@@ -335,78 +672,82 @@ class G1RuleEngine:
             'recommendations': recommendations
         }
 
+    # KMI approver matrix as data: procurement type -> (baseline roles,
+    # baseline reasons, conditional rules). Each conditional rule is a
+    # Python expression over ``ctx`` (procurement context) and ``cost``
+    # (estimated cost); thresholds are referenced by name and inlined when
+    # the rule set is compiled.
+    APPROVER_RULES = {
+        'CC_APPROVED_SPEND_PLAN': ((), ('Approved spend plan – CC purchase',), ()),
+        'CC_NOT_IN_SPEND_PLAN': ((), (), (
+            ("cost > CC_PMO_THRESHOLD", ('PMO', 'Finance'), ('PMO: CC > $5k', 'Finance: CC > $5k')),
+        )),
+        'PROC_COMPETITIVE': (('PMO', 'EVP', 'Finance'), ('PMO: Competitive procurement', 'EVP: Policy', 'Finance: Policy'), (
+            ("ctx.get('contractExecuted')", ('Contracts',), ('Contracts: Executed by a contract',)),
+            ("cost > PROC_PRESIDENT_THRESHOLD", ('President',), ('President: > $250k',)),
+        )),
+        'PROC_SOLE_SOURCE': (('PMO', 'EVP', 'Finance'), ('PMO: Sole source', 'EVP: Policy', 'Finance: Policy'), (
+            ("ctx.get('contractExecuted') or ctx.get('ssjAmount', 0) > SSJ_CONTRACTS_THRESHOLD", ('Contracts',), ('Contracts: Contract/SSJ > $250k',)),
+            ("cost > PROC_PRESIDENT_THRESHOLD", ('President',), ('President: > $250k',)),
+        )),
+        'BIDS_AND_PROPOSALS': (('PMO', 'EVP', 'Finance'), ('PMO: B&P baseline', 'EVP: B&P baseline', 'Finance: B&P baseline'), (
+            ("cost > PROC_PRESIDENT_THRESHOLD", ('President',), ('President: > $250k',)),
+        )),
+        'ROMS': (('PMO', 'EVP'), ('PMO: ROMS', 'EVP: ROMS'), (
+            ("cost > ROMS_FINANCE_THRESHOLD", ('Finance',), ('Finance: ROMS > $250k',)),
+            ("cost > ROMS_PRESIDENT_THRESHOLD", ('President',), ('President: ROMS > $500k',)),
+        )),
+    }
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _compile(procurement_type):
+        """Compile the approver rules for one procurement type into a handler.
+
+        The generated handler takes ``(estimated_cost, ctx)`` and returns a
+        ``(required_set, reasons_list)`` tuple, with the rule conditions and
+        thresholds inlined so no table walking happens per call.
+
+        Raises:
+            KeyError: If the procurement type has no rules.
+        """
+        roles, reasons, conditionals = G1RuleEngine.APPROVER_RULES[procurement_type]
+        lines = [
+            "def _approvers(cost, ctx):",
+            "    required = set()",
+            f"    reasons = {list(reasons)!r}",
+        ]
+        if roles:
+            lines.append(f"    required.update({list(roles)!r})")
+        for condition, cond_roles, cond_reasons in conditionals:
+            for name, value in G1RuleEngine.PRICING_THRESHOLDS.items():
+                condition = condition.replace(name, repr(value))
+            lines.append(f"    if {condition}:")
+            for role in cond_roles:
+                lines.append(f"        required.add({role!r})")
+            lines.append(f"        reasons.extend({list(cond_reasons)!r})")
+        lines.append("    return required, reasons")
+        
+        namespace = {}
+        exec(compile("\n".join(lines), f"<g1-approvers:{procurement_type}>", "exec"), namespace)
+        return namespace['_approvers']
+
     @staticmethod
     def _resolve_approvers(context):
         """Resolve required approvers based on KMI matrix rules"""
-        required = set()
-        reasons = []
-
         procurement_type = context.get('procurementType')
-        estimated_cost = context.get('estimatedCost', 0)
-
-        if procurement_type == 'CC_APPROVED_SPEND_PLAN':
-            return {'required': [], 'reasons': ['Approved spend plan – CC purchase']}
-
-        elif procurement_type == 'CC_NOT_IN_SPEND_PLAN':
-            if estimated_cost > G1RuleEngine.PRICING_THRESHOLDS['CC_PMO_THRESHOLD']:
-                required.add('PMO')
-                required.add('Finance')
-                reasons.extend(['PMO: CC > $5k', 'Finance: CC > $5k'])
-
-        elif procurement_type == 'PROC_COMPETITIVE':
-            required.update(['PMO', 'EVP', 'Finance'])
-            reasons.extend(['PMO: Competitive procurement', 'EVP: Policy', 'Finance: Policy'])
-            
-            if context.get('contractExecuted'):
-                required.add('Contracts')
-                reasons.append('Contracts: Executed by a contract')
-            
-            if estimated_cost > G1RuleEngine.PRICING_THRESHOLDS['PROC_PRESIDENT_THRESHOLD']:
-                required.add('President')
-                reasons.append('President: > $250k')
-
-        elif procurement_type == 'PROC_SOLE_SOURCE':
-            required.update(['PMO', 'EVP', 'Finance'])
-            reasons.extend(['PMO: Sole source', 'EVP: Policy', 'Finance: Policy'])
-            
-            if context.get('contractExecuted') or context.get('ssjAmount', 0) > G1RuleEngine.PRICING_THRESHOLDS['SSJ_CONTRACTS_THRESHOLD']:
-                required.add('Contracts')
-                reasons.append('Contracts: Contract/SSJ > $250k')
-            
-            if estimated_cost > G1RuleEngine.PRICING_THRESHOLDS['PROC_PRESIDENT_THRESHOLD']:
-                required.add('President')
-                reasons.append('President: > $250k')
-
-        elif procurement_type == 'BIDS_AND_PROPOSALS':
-            required.update(['PMO', 'EVP', 'Finance'])
-            reasons.extend(['PMO: B&P baseline', 'EVP: B&P baseline', 'Finance: B&P baseline'])
-            
-            if estimated_cost > G1RuleEngine.PRICING_THRESHOLDS['PROC_PRESIDENT_THRESHOLD']:
-                required.add('President')
-                reasons.append('President: > $250k')
-
-        elif procurement_type == 'ROMS':
-            required.update(['PMO', 'EVP'])
-            reasons.extend(['PMO: ROMS', 'EVP: ROMS'])
-            
-            if estimated_cost > G1RuleEngine.PRICING_THRESHOLDS['ROMS_FINANCE_THRESHOLD']:
-                required.add('Finance')
-                reasons.append('Finance: ROMS > $250k')
-            
-            if estimated_cost > G1RuleEngine.PRICING_THRESHOLDS['ROMS_PRESIDENT_THRESHOLD']:
-                required.add('President')
-                reasons.append('President: ROMS > $500k')
-
+        handler = _APPROVER_HANDLERS.get(procurement_type, _rule_default) if isinstance(procurement_type, str) else _rule_default
+        required, reasons = handler(context.get('estimatedCost', 0), context)
         return {'required': list(required), 'reasons': reasons}
 
     @staticmethod
     def _generate_checklist(context, g1_result):
         """Generate checklist items for UI display"""
         checklist = []
+        codes = frozenset(g1_result.reasonCodes)
 
         # Pricing completeness
-        pricing_complete = not any(code in g1_result.reasonCodes for code in 
-            ['MISSING_PRICE', 'INVALID_PRICE', 'MISSING_CURRENCY', 'MISSING_LEAD_TIME', 'MISSING_DELIVERY_TERMS', 'MISSING_QUOTE_VALIDITY'])
+        pricing_complete = codes.isdisjoint(_PRICING_CODES)
         checklist.append(ChecklistItem(
             id='pricing',
             label='Complete pricing for all vendors',
@@ -416,8 +757,7 @@ class G1RuleEngine:
         ))
 
         # Document sufficiency
-        docs_sufficient = not any(code in g1_result.reasonCodes for code in 
-            ['INSUFFICIENT_EVIDENCE', 'INSUFFICIENT_SPECS'])
+        docs_sufficient = codes.isdisjoint(_DOC_CODES)
         checklist.append(ChecklistItem(
             id='documents',
             label='Sufficient supporting documents',
@@ -427,8 +767,7 @@ class G1RuleEngine:
         ))
 
         # Business rules
-        business_rules_pass = not any(code in g1_result.reasonCodes for code in 
-            ['SOLE_SOURCE_JUST_REQUIRED', 'CONTRACT_REQUIRED', 'UNBUDGETED_PROCUREMENT'])
+        business_rules_pass = codes.isdisjoint(_BIZ_CODES)
         checklist.append(ChecklistItem(
             id='business_rules',
             label='Business rules compliance',
@@ -452,34 +791,262 @@ class G1RuleEngine:
     @staticmethod
     def _calculate_readiness_percentage(checklist):
         """Calculate readiness percentage based on checklist"""
-        required_items = [item for item in checklist if item.required]
-        passed_items = [item for item in required_items if item.status == 'PASS']
-        return (len(passed_items) / len(required_items) * 100) if required_items else 0
+        # A checklist has a handful of rows: one plain pass beats any array setup
+        required = passed = 0
+        for item in checklist:
+            if item.required:
+                required += 1
+                if item.status == 'PASS':
+                    passed += 1
+        return (passed / required * 100) if required else 0
+
+    @staticmethod
+    def calculate_readiness_percentages(checklists: List[List[ChecklistItem]]) -> List[float]:
+        """Readiness percentage for many checklists at once (e.g. a PR dashboard).
+
+        Uses a Numba-parallel kernel when numba is installed, vectorized NumPy
+        otherwise, and falls back to the per-checklist calculation without NumPy.
+        """
+        if not NUMPY_AVAILABLE or not checklists:
+            return [float(G1RuleEngine._calculate_readiness_percentage(c)) for c in checklists]
+        
+        width = max((len(c) for c in checklists), default=0)
+        required = np.zeros((len(checklists), width), dtype=np.uint8)
+        passed = np.zeros((len(checklists), width), dtype=np.uint8)
+        for i, checklist in enumerate(checklists):
+            for j, item in enumerate(checklist):
+                required[i, j] = item.required
+                passed[i, j] = item.status == 'PASS'
+        return _readiness_kernel(required, passed).tolist()
+
+def _rule_default(estimated_cost, context):
+    """Approver handler for procurement types outside the KMI matrix."""
+    return set(), []
+
+# procurement type -> compiled approver handler, built once at import
+_APPROVER_HANDLERS = {
+    procurement_type: G1RuleEngine._compile(procurement_type)
+    for procurement_type in G1RuleEngine.APPROVER_RULES
+}
+
+def _detach(value: Any) -> Any:
+    """Copy of a record whose mutable parts (nested dataclasses, lists, dicts, deques) are not shared.
+    
+    Immutable leaves are shared, and so are audit entries: the audit deque is
+    copied but its entries are append-only and never mutated in place.
+    """
+    if is_dataclass(value) and not isinstance(value, type):
+        clone = copy.copy(value)
+        for f in fields(value):
+            attr = getattr(value, f.name)
+            if isinstance(attr, (list, dict, deque)) or is_dataclass(attr):
+                object.__setattr__(clone, f.name, _detach(attr))
+        return clone
+    if isinstance(value, deque):
+        return deque(value, value.maxlen)
+    if isinstance(value, list):
+        return [_detach(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _detach(v) for k, v in value.items()}
+    return value
+
+class _ShardedStore:
+    """Dict-like in-memory store split across lock-striped shards.
+    
+    Writers to one record only contend with records in the same shard, and
+    snapshot() lets readers detach a record under its lock and serialize it
+    after releasing it.
+    """
+    
+    SHARDS = 16  # power of two, so the shard index is a mask
+    
+    def __init__(self):
+        self._shards: List[Dict[str, Any]] = [dict() for _ in range(self.SHARDS)]
+        self._locks = [threading.RLock() for _ in range(self.SHARDS)]
+
+    def _index(self, key: str) -> int:
+        return hash(key) & (self.SHARDS - 1)
+
+    def lock(self, key: str) -> threading.RLock:
+        """Lock guarding the shard that holds ``key``."""
+        return self._locks[self._index(key)]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._shards[self._index(key)]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._shards[self._index(key)][key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        i = self._index(key)
+        with self._locks[i]:
+            self._shards[i][key] = value
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._shards[self._index(key)].get(key, default)
+
+    def snapshot(self, key: str) -> Any:
+        """Copy of the record taken under its shard lock (see _detach), or None."""
+        i = self._index(key)
+        with self._locks[i]:
+            obj = self._shards[i].get(key)
+            return _detach(obj) if obj is not None else None
+
+    def values(self):
+        for shard in self._shards:
+            yield from list(shard.values())
+
+class _PRColumns:
+    """Column-oriented index of PR scalars for scans across many PRs.
+    
+    Full PR records stay in the sharded store; this keeps status and
+    estimated cost in parallel arrays (NumPy when available, growing by
+    doubling) so status filters and dashboard aggregates don't walk every
+    nested PR object.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self.ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if NUMPY_AVAILABLE:
+            self.status = np.empty(capacity, dtype='U24')
+            self.estimated_cost = np.empty(capacity, dtype='f8')
+        else:
+            self.status = []
+            self.estimated_cost = []
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self.status)
+        status = np.empty(capacity, dtype='U24')
+        estimated_cost = np.empty(capacity, dtype='f8')
+        status[:len(self.ids)] = self.status[:len(self.ids)]
+        estimated_cost[:len(self.ids)] = self.estimated_cost[:len(self.ids)]
+        self.status, self.estimated_cost = status, estimated_cost
+
+    def append(self, pr: PR) -> None:
+        with self._lock:
+            row = len(self.ids)
+            if NUMPY_AVAILABLE:
+                if row == len(self.status):
+                    self._grow()
+                self.status[row] = pr.status
+                self.estimated_cost[row] = pr.estimatedCost
+            else:
+                self.status.append(pr.status)
+                self.estimated_cost.append(pr.estimatedCost)
+            self.ids.append(pr.id)
+            self._row[pr.id] = row
+
+    def set_status(self, pr_id: str, status: str) -> None:
+        with self._lock:
+            self.status[self._row[pr_id]] = status
+
+    def ids_with_status(self, status: str) -> List[str]:
+        """Ids of PRs currently in ``status``, in creation order."""
+        with self._lock:
+            n = len(self.ids)
+            if NUMPY_AVAILABLE:
+                rows = np.flatnonzero(self.status[:n] == status).tolist()
+            else:
+                rows = [i for i, s in enumerate(self.status) if s == status]
+            return [self.ids[i] for i in rows]
 
 class PostCartService:
     """Main service for Post-Cart phase operations"""
     
     def __init__(self):
-        self.prs = {}  # In-memory storage for demo
-        self.rfqs = {}  # In-memory storage for demo
+        self.prs = _ShardedStore()  # In-memory storage for demo
+        self._pr_cols = _PRColumns()  # status/cost columns over self.prs
+        self.rfqs = _ShardedStore()  # In-memory storage for demo
         self.g1_engine = G1RuleEngine()
+        # content hash -> (decision dict, decision JSON), in LRU order. G1 is a pure
+        # function of the request body, so entries never go stale.
+        self._g1_cache: "OrderedDict[bytes, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+        self._g1_cache_lock = threading.Lock()
+
+    @staticmethod
+    def _g1_cache_key(context_data: Dict[str, Any]) -> bytes:
+        """Hash a G1 context canonically so key order in the request doesn't matter."""
+        payload = json.dumps(context_data, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _g1_context(context_data: Dict[str, Any]) -> G1Context:
+        """Convert request data to G1Context; the engine only reads line items,
+        so they stay lightweight tuples (PRs still persist full LineItems)"""
+        return G1Context(
+            selectedVendors=context_data['selectedVendors'],
+            items=[LineItemNT(**item) for item in context_data['items']],
+            pricing={k: [LineItemNT(**item) for item in v] for k, v in context_data['pricing'].items()},
+            procurementContext=context_data['procurementContext']
+        )
+
+    def _evaluate_g1_cached(self, context_data: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        """Evaluate G1, returning the cached (decision dict, decision JSON) pair itself."""
+        cache_key = self._g1_cache_key(context_data)
+        with self._g1_cache_lock:
+            entry = self._g1_cache.get(cache_key)
+            if entry is not None:
+                self._g1_cache.move_to_end(cache_key)
+                return entry
+        
+        # Generate decision
+        decision = self.g1_engine.generate_cart_decision(self._g1_context(context_data))
+        
+        # Convert to dict and JSON once; hits reuse both
+        result = fast_asdict(decision)
+        entry = (result, _dumps(result))
+        
+        with self._g1_cache_lock:
+            self._g1_cache[cache_key] = entry
+            self._g1_cache.move_to_end(cache_key)
+            while len(self._g1_cache) > G1_CACHE_SIZE:
+                self._g1_cache.popitem(last=False)
+        
+        return entry
 
     def evaluate_g1(self, context_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Evaluate G1 decision gate"""
+        """Evaluate G1 decision gate.
+        
+        The returned dict is shared with the decision cache: treat it as
+        read-only (copy it before modifying).
+        """
         try:
-            # Convert context data to G1Context
-            context = G1Context(
-                selectedVendors=context_data['selectedVendors'],
-                items=[LineItem(**item) for item in context_data['items']],
-                pricing={k: [LineItem(**item) for item in v] for k, v in context_data['pricing'].items()},
-                procurementContext=context_data['procurementContext']
-            )
+            return self._evaluate_g1_cached(context_data)[0]
             
-            # Generate decision
-            decision = self.g1_engine.generate_cart_decision(context)
+        except Exception as e:
+            logger.error(f"Error evaluating G1: {e}")
+            raise
+
+    def evaluate_g1_fast(self, context_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Quick pass/fail G1 check for polling: pricing gaps stop at the first one.
+        
+        The recommendation, checklist and readiness match evaluate_g1; only the
+        pricing entries in reasonCodes/missingItems may be incomplete. A cached
+        decision is returned as-is, so treat the result as read-only.
+        """
+        try:
+            # A cached full evaluation is at least as informative
+            with self._g1_cache_lock:
+                entry = self._g1_cache.get(self._g1_cache_key(context_data))
+            if entry is not None:
+                return entry[0]
+            
+            decision = self.g1_engine.generate_cart_decision(self._g1_context(context_data), detailed=False)
+            return fast_asdict(decision)
             
-            # Convert to dict for JSON serialization
-            return asdict(decision)
+        except Exception as e:
+            logger.error(f"Error evaluating G1 (fast): {e}")
+            raise
+
+    def evaluate_g1_json(self, context_data: Dict[str, Any]) -> bytes:
+        """Evaluate G1 decision gate and return the decision as JSON bytes"""
+        try:
+            return self._evaluate_g1_cached(context_data)[1]
             
         except Exception as e:
             logger.error(f"Error evaluating G1: {e}")
@@ -488,7 +1055,9 @@ class PostCartService:
     def create_pr(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new PR"""
         try:
-            pr_id = f"PR-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8]}"
+            now = datetime.now()
+            now_iso = now.isoformat()
+            pr_id = _next_id('PR', now)
             
             # Create PR object
             pr = PR(
@@ -508,16 +1077,17 @@ class PostCartService:
                     decisions=[]
                 ),
                 status='PR_DRAFT',
-                audit=[],
-                createdAt=datetime.now().isoformat(),
-                updatedAt=datetime.now().isoformat()
+                audit=deque(maxlen=AUDIT_MAXLEN),
+                createdAt=now_iso,
+                updatedAt=now_iso
             )
             
             # Store PR
             self.prs[pr_id] = pr
+            self._pr_cols.append(pr)
             
             logger.info(f"Created PR {pr_id}")
-            return asdict(pr)
+            return pr.to_dict()
             
         except Exception as e:
             logger.error(f"Error creating PR: {e}")
@@ -530,19 +1100,22 @@ class PostCartService:
                 raise ValueError(f"PR {pr_id} not found")
             
             pr = self.prs[pr_id]
+            now_iso = datetime.now().isoformat()
             
-            # Update approval route
-            pr.approvals.required = approval_route['required']
-            pr.status = 'APPROVALS_IN_FLIGHT'
-            pr.updatedAt = datetime.now().isoformat()
-            
-            # Add audit entry
-            pr.audit.append(AuditEntry(
-                actor='system',
-                action='APPROVAL_ROUTING_STARTED',
-                timestamp=datetime.now().isoformat(),
-                reason=f"Started approval routing for {len(approval_route['required'])} approvers"
-            ))
+            with self.prs.lock(pr_id):
+                # Update approval route
+                pr.approvals.required = approval_route['required']
+                pr.status = 'APPROVALS_IN_FLIGHT'
+                pr.updatedAt = now_iso
+                self._pr_cols.set_status(pr_id, pr.status)
+                
+                # Add audit entry
+                pr.record_audit(AuditEntry(
+                    actor='system',
+                    action='APPROVAL_ROUTING_STARTED',
+                    timestamp=now_iso,
+                    reason=f"Started approval routing for {len(approval_route['required'])} approvers"
+                ))
             
             logger.info(f"Started approval routing for PR {pr_id}")
             return {'success': True, 'message': 'Approval routing started successfully'}
@@ -554,7 +1127,9 @@ class PostCartService:
     def generate_rfq(self, rfq_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a new RFQ"""
         try:
-            rfq_id = f"RFQ-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8]}"
+            now = datetime.now()
+            now_iso = now.isoformat()
+            rfq_id = _next_id('RFQ', now)
             
             # Create RFQ object
             rfq = RFQ(
@@ -563,16 +1138,16 @@ class PostCartService:
                 vendors=[VendorRFQ(**vendor) for vendor in rfq_data['vendors']],
                 dueDate=rfq_data['dueDate'],
                 status='RFQ_PREP',
-                audit=[],
-                createdAt=datetime.now().isoformat(),
-                updatedAt=datetime.now().isoformat()
+                audit=deque(maxlen=AUDIT_MAXLEN),
+                createdAt=now_iso,
+                updatedAt=now_iso
             )
             
             # Store RFQ
             self.rfqs[rfq_id] = rfq
             
             logger.info(f"Generated RFQ {rfq_id}")
-            return asdict(rfq)
+            return rfq.to_dict()
             
         except Exception as e:
             logger.error(f"Error generating RFQ: {e}")
@@ -585,22 +1160,24 @@ class PostCartService:
                 raise ValueError(f"RFQ {rfq_id} not found")
             
             rfq = self.rfqs[rfq_id]
+            now_iso = datetime.now().isoformat()
             
-            # Update vendor statuses
-            for vendor in rfq.vendors:
-                vendor.status = 'SENT'
-                vendor.sentAt = datetime.now().isoformat()
-            
-            rfq.status = 'RFQ_SENT'
-            rfq.updatedAt = datetime.now().isoformat()
-            
-            # Add audit entry
-            rfq.audit.append(AuditEntry(
-                actor='system',
-                action='RFQ_SENT',
-                timestamp=datetime.now().isoformat(),
-                reason=f"Sent RFQ to {len(rfq.vendors)} vendors"
-            ))
+            with self.rfqs.lock(rfq_id):
+                # Update vendor statuses
+                for vendor in rfq.vendors:
+                    vendor.status = 'SENT'
+                    vendor.sentAt = now_iso
+                
+                rfq.status = 'RFQ_SENT'
+                rfq.updatedAt = now_iso
+                
+                # Add audit entry
+                rfq.record_audit(AuditEntry(
+                    actor='system',
+                    action='RFQ_SENT',
+                    timestamp=now_iso,
+                    reason=f"Sent RFQ to {len(rfq.vendors)} vendors"
+                ))
             
             logger.info(f"Sent RFQ {rfq_id} to {len(rfq.vendors)} vendors")
             return {'success': True, 'message': 'RFQ sent successfully'}
@@ -612,10 +1189,38 @@ class PostCartService:
     def get_pr_status(self, pr_id: str) -> Dict[str, Any]:
         """Get PR status"""
         try:
-            if pr_id not in self.prs:
+            pr = self.prs.snapshot(pr_id)
+            if pr is None:
                 raise ValueError(f"PR {pr_id} not found")
             
-            return asdict(self.prs[pr_id])
+            return pr.to_dict()
+            
+        except Exception as e:
+            logger.error(f"Error getting PR status: {e}")
+            raise
+
+    def get_prs_by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Get all PRs currently in the given status"""
+        try:
+            result = []
+            for pr_id in self._pr_cols.ids_with_status(status):
+                pr = self.prs.snapshot(pr_id)
+                if pr is not None:
+                    result.append(pr.to_dict())
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error getting PRs by status: {e}")
+            raise
+
+    def get_pr_status_json(self, pr_id: str) -> bytes:
+        """Get PR status as JSON bytes"""
+        try:
+            pr = self.prs.snapshot(pr_id)
+            if pr is None:
+                raise ValueError(f"PR {pr_id} not found")
+            
+            return _dumps(pr)
             
         except Exception as e:
             logger.error(f"Error getting PR status: {e}")
@@ -624,10 +1229,24 @@ class PostCartService:
     def get_rfq_status(self, rfq_id: str) -> Dict[str, Any]:
         """Get RFQ status"""
         try:
-            if rfq_id not in self.rfqs:
+            rfq = self.rfqs.snapshot(rfq_id)
+            if rfq is None:
+                raise ValueError(f"RFQ {rfq_id} not found")
+            
+            return rfq.to_dict()
+            
+        except Exception as e:
+            logger.error(f"Error getting RFQ status: {e}")
+            raise
+
+    def get_rfq_status_json(self, rfq_id: str) -> bytes:
+        """Get RFQ status as JSON bytes"""
+        try:
+            rfq = self.rfqs.snapshot(rfq_id)
+            if rfq is None:
                 raise ValueError(f"RFQ {rfq_id} not found")
             
-            return asdict(self.rfqs[rfq_id])
+            return _dumps(rfq)
             
         except Exception as e:
             logger.error(f"Error getting RFQ status: {e}")
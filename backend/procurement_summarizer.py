@@ -27,8 +27,20 @@ Setup
 1) Python 3.10+
 2) Install dependencies:
    pip install pypdf docx2txt pillow pytesseract python-pptx pandas lxml beautifulsoup4 requests openpyxl chardet
+   # Optional faster OCR (keeps the Tesseract engine loaded between images)
+   pip install tesserocr
+   # Optional faster PDF text extraction + OCR of scanned pages
+   pip install pymupdf
+   # Optional faster HTML text extraction
+   pip install selectolax
+   # Optional exact token budgeting of prompts
+   pip install tiktoken
+   # Optional faster JSON encode/decode for LLM payloads and result files
+   pip install orjson
    # Optional fallback extractor
    pip install textract
+   # Optional prompt compression before the LLM call (opt-in: PROC_COMPRESS=auto|keywords, default off)
+   pip install llmlingua
 
    # For OCR: install Tesseract on your system.
    # macOS (brew): brew install tesseract
@@ -49,15 +61,24 @@ from __future__ import annotations
 import os
 import io
 import re
+import csv
 import sys
 import json
-import glob
 import math
+import sqlite3
+import hashlib
 import time
 import base64
+import queue
+import asyncio
 import argparse
 import logging
-from dataclasses import dataclass, asdict
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import defaultdict
+from dataclasses import dataclass, asdict, replace
 from typing import List, Optional, Dict, Any, Iterable, Tuple
 
 # Text extraction libs
@@ -74,6 +95,22 @@ try:
     TESSERACT_AVAILABLE = True
 except ImportError:
     TESSERACT_AVAILABLE = False
+
+# Preferred OCR backend: tesserocr keeps the Tesseract engine loaded between calls
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    from PIL import Image  # tesserocr depends on Pillow
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# PyMuPDF: much faster PDF text extraction, and page rendering for OCR of
+# scanned pages. Set PDF_BACKEND=pypdf to force the pypdf extractor.
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = os.getenv("PDF_BACKEND", "pymupdf").lower() != "pypdf"
+except ImportError:
+    PYMUPDF_AVAILABLE = False
     
 try:
     from pptx import Presentation
@@ -81,20 +118,58 @@ try:
 except ImportError:
     PPTX_AVAILABLE = False
     
-import pandas as pd
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
 try:
     from bs4 import BeautifulSoup
     BS4_AVAILABLE = True
 except ImportError:
     BS4_AVAILABLE = False
+
+# Preferred HTML text extractor (lexbor-based, much faster than bs4+lxml)
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
     
+from utils.token_utils import truncate_to_tokens
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 try:
     import chardet
     CHARDET_AVAILABLE = True
 except ImportError:
     CHARDET_AVAILABLE = False
 
+# Optional prompt compression (token pruning) before the LLM call
+try:
+    from llmlingua import PromptCompressor
+    LLMLINGUA_AVAILABLE = True
+except ImportError:
+    LLMLINGUA_AVAILABLE = False
+
 # Optional fallback
 try:
     import textract  # type: ignore
@@ -113,6 +188,17 @@ def read_binary(path: str) -> bytes:
         return f.read()
 
 
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """UTF-8 JSON bytes, via orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+def json_loads(data: Any) -> Any:
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
 def sniff_decode(data: bytes) -> str:
     """Decode bytes to text with chardet fallback."""
     try:
@@ -128,7 +214,27 @@ def sniff_decode(data: bytes) -> str:
 # Extractors for each type
 # ---------------------------
 
-def extract_text_pdf(path: str) -> str:
+# Pages with less extracted text than this are treated as scanned and OCR'd
+PDF_OCR_MIN_CHARS = int(os.getenv("PDF_OCR_MIN_CHARS", "10"))
+# Documents averaging at least this many text-layer chars per page are
+# born-digital and skip OCR entirely (blank/figure pages stay as they are)
+PDF_BORN_DIGITAL_CHARS_PER_PAGE = int(os.getenv("PDF_BORN_DIGITAL_CHARS_PER_PAGE", "20"))
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "200"))
+
+
+def _ocr_image_bytes(data: bytes) -> str:
+    """OCR an encoded image (e.g. a rendered PDF page as PNG)."""
+    if TESSEROCR_AVAILABLE:
+        api = _acquire_tess_api()
+        try:
+            api.SetImage(Image.open(io.BytesIO(data)))
+            return api.GetUTF8Text()
+        finally:
+            _tess_pool.put(api)
+    return pytesseract.image_to_string(Image.open(io.BytesIO(data)))
+
+
+def _extract_text_pdf_pypdf(path: str) -> str:
     text_parts: List[str] = []
     with open(path, 'rb') as f:
         reader = PdfReader(f)
@@ -140,6 +246,65 @@ def extract_text_pdf(path: str) -> str:
     return "\n".join(text_parts).strip()
 
 
+def _ocr_pdf_page(path: str, index: int) -> str:
+    """Render one PDF page and OCR it. Opens its own document: fitz documents
+    must not be shared across threads."""
+    doc = fitz.open(path)
+    try:
+        pix = doc[index].get_pixmap(dpi=PDF_OCR_DPI)
+        png = pix.tobytes("png")
+    finally:
+        doc.close()
+    return _ocr_image_bytes(png)
+
+
+def extract_text_pdf(path: str) -> str:
+    if not PYMUPDF_AVAILABLE:
+        return _extract_text_pdf_pypdf(path)
+
+    text_parts: List[str] = []
+    doc = fitz.open(path)
+    try:
+        for page in doc:
+            try:
+                text_parts.append(page.get_text("text") or "")
+            except Exception as e:
+                logging.warning(f"PDF page extract failed: {e}")
+                text_parts.append("")
+    finally:
+        doc.close()
+
+    chars_per_page = sum(len(text.strip()) for text in text_parts) / max(len(text_parts), 1)
+    if chars_per_page >= PDF_BORN_DIGITAL_CHARS_PER_PAGE:
+        logging.info(f"PDF {path}: text layer ({chars_per_page:.0f} chars/page), skipping OCR")
+        return "\n".join(text_parts).strip()
+
+    # Pages with (almost) no text layer are likely scanned: render and OCR
+    # them, one page per worker so rasterization and OCR use every core.
+    # Inside a process-pool worker the pool already fills the cores, so pages
+    # are OCR'd sequentially there.
+    scanned = [i for i, text in enumerate(text_parts) if len(text.strip()) < PDF_OCR_MIN_CHARS]
+    if scanned and (TESSEROCR_AVAILABLE or TESSERACT_AVAILABLE):
+        logging.info(f"PDF {path}: {chars_per_page:.0f} chars/page, OCR'ing {len(scanned)} of {len(text_parts)} pages")
+        def ocr(index: int) -> str:
+            try:
+                return _ocr_pdf_page(path, index)
+            except Exception as e:
+                logging.warning(f"PDF page OCR failed: {e}")
+                return ""
+
+        if len(scanned) == 1 or multiprocessing.parent_process() is not None:
+            ocr_texts = [ocr(index) for index in scanned]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(scanned), os.cpu_count() or 1)) as executor:
+                ocr_texts = list(executor.map(ocr, scanned))
+        for index, text in zip(scanned, ocr_texts):
+            if text:
+                text_parts[index] = text
+
+    return "\n".join(text_parts).strip()
+
+
 def extract_text_docx(path: str) -> str:
     if not DOCX2TXT_AVAILABLE:
         return ""
@@ -154,7 +319,100 @@ def extract_text_txt(path: str) -> str:
     return sniff_decode(data)
 
 
+# Pool of persistent tesserocr engines; a handle is not thread-safe, so each
+# OCR call checks one out exclusively. TESS_WARMUP=1 creates and warms the
+# whole pool in the background at import instead of on first use. Process-pool
+# workers already run one per core, so each keeps a single engine.
+TESS_POOL_SIZE = int(os.getenv("TESS_POOL_SIZE", str(os.cpu_count() or 1)))
+TESS_WARMUP = os.getenv("TESS_WARMUP", "0").lower() in ("1", "true", "yes")
+_tess_pool: "queue.Queue" = queue.Queue()
+_tess_created = 0
+_tess_lock = threading.Lock()
+
+
+def _tess_pool_limit() -> int:
+    # Checked at call time: forked workers inherit the parent's module globals
+    return 1 if multiprocessing.parent_process() is not None else TESS_POOL_SIZE
+
+
+def _new_tess_api():
+    api = PyTessBaseAPI(psm=PSM.AUTO)
+    # The first recognition loads the traineddata/LSTM model; pay that here
+    api.SetImage(Image.new("L", (64, 64), 255))
+    api.GetUTF8Text()
+    return api
+
+
+def _warm_one_tess_api() -> bool:
+    global _tess_created
+    try:
+        _tess_pool.put(_new_tess_api())
+        return True
+    except Exception as e:
+        logging.warning(f"tesserocr warmup failed: {e}")
+        with _tess_lock:
+            _tess_created -= 1
+        return False
+
+
+def warm_tess_pool(size: int = TESS_POOL_SIZE) -> int:
+    """Create and warm up to ``size`` tesserocr engines in parallel; returns how many were added."""
+    global _tess_created
+    if not TESSEROCR_AVAILABLE:
+        return 0
+    with _tess_lock:
+        count = max(0, min(size, _tess_pool_limit()) - _tess_created)
+        _tess_created += count
+    if count == 0:
+        return 0
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        added = sum(executor.map(lambda _: _warm_one_tess_api(), range(count)))
+    logging.info(f"Warmed {added} tesserocr engine(s)")
+    return added
+
+
+def _acquire_tess_api():
+    global _tess_created
+    try:
+        return _tess_pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _tess_lock:
+        create = _tess_created < _tess_pool_limit()
+        if create:
+            _tess_created += 1
+    if create:
+        try:
+            return _new_tess_api()
+        except Exception:
+            with _tess_lock:
+                _tess_created -= 1
+            raise
+    return _tess_pool.get()
+
+
+def _ocr_tesserocr(path: str) -> str:
+    api = _acquire_tess_api()
+    try:
+        api.SetImageFile(path)
+        return api.GetUTF8Text()
+    finally:
+        _tess_pool.put(api)
+
+
+if TESSEROCR_AVAILABLE and TESS_WARMUP:
+    threading.Thread(target=warm_tess_pool, name="tess-warmup", daemon=True).start()
+
+
 def extract_text_image(path: str) -> str:
+    if TESSEROCR_AVAILABLE:
+        try:
+            return _ocr_tesserocr(path)
+        except Exception as e:
+            if not TESSERACT_AVAILABLE:
+                logging.error(f"OCR failed for {path}: {e}")
+                return ""
+            logging.warning(f"tesserocr failed for {path}, retrying with pytesseract: {e}")
     if not TESSERACT_AVAILABLE:
         logging.warning("PIL/pytesseract not available - cannot extract from images")
         return ""
@@ -166,39 +424,130 @@ def extract_text_image(path: str) -> str:
         return ""
 
 
+def extract_text_images_batch(paths: List[str]) -> Dict[str, str]:
+    """OCR many images with a single tesseract run.
+
+    Tesseract accepts a text file listing image paths and emits one page per
+    image separated by form feeds, so the engine starts and loads its language
+    data once for the whole batch. Falls back to per-file OCR when batch mode
+    fails or the page count doesn't line up (e.g. multi-page TIFFs).
+    """
+    if not paths:
+        return {}
+    if TESSEROCR_AVAILABLE or not TESSERACT_AVAILABLE:
+        # A persistent tesserocr engine has no startup cost to amortize
+        return {path: extract_text_image(path) for path in paths}
+
+    list_file = None
+    try:
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as tmp:
+            tmp.write("\n".join(os.path.abspath(path) for path in paths) + "\n")
+            list_file = tmp.name
+        pages = pytesseract.image_to_string(list_file).split("\f")
+        # Tesseract ends the last page with a form feed too
+        if len(pages) == len(paths) + 1 and not pages[-1].strip():
+            pages.pop()
+        if len(pages) == len(paths):
+            return dict(zip(paths, pages))
+        logging.warning(f"Batch OCR returned {len(pages)} pages for {len(paths)} images; falling back to per-file OCR")
+    except Exception as e:
+        logging.warning(f"Batch OCR failed, falling back to per-file OCR: {e}")
+    finally:
+        if list_file:
+            try:
+                os.unlink(list_file)
+            except OSError:
+                pass
+    return {path: extract_text_image(path) for path in paths}
+
+
+# Decks with more slides than this are parsed in slide ranges across the process pool
+PPTX_PARALLEL_MIN_SLIDES = int(os.getenv("PPTX_PARALLEL_MIN_SLIDES", "20"))
+
+
+def _slides_text(slides: Iterable[Any]) -> List[str]:
+    texts = []
+    for slide in slides:
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                texts.append(shape.text)
+    return texts
+
+
+def _pptx_range_text(path: str, start: int, stop: int) -> List[str]:
+    """Worker: reopen the deck (cheaper than pickling it) and read slides [start, stop)."""
+    slides = Presentation(path).slides
+    return _slides_text(slides[i] for i in range(start, stop))
+
+
 def extract_text_pptx(path: str) -> str:
     if not PPTX_AVAILABLE:
         return ""
     try:
         prs = Presentation(path)
-        texts = []
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    texts.append(shape.text)
-        return "\n".join(texts)
+        n_slides = len(prs.slides)
+        # Only from the parent process: pool workers must not fan out again
+        if n_slides > PPTX_PARALLEL_MIN_SLIDES and multiprocessing.parent_process() is None:
+            n_shards = min(os.cpu_count() or 1, n_slides // PPTX_PARALLEL_MIN_SLIDES + 1)
+            if n_shards > 1:
+                bounds = [n_slides * i // n_shards for i in range(n_shards + 1)]
+                futures = [
+                    _get_process_pool().submit(_pptx_range_text, path, bounds[i], bounds[i + 1])
+                    for i in range(n_shards)
+                ]
+                return "\n".join(text for future in futures for text in future.result())
+        return "\n".join(_slides_text(prs.slides))
     except Exception:
         return ""
 
 
 def extract_text_spreadsheet(path: str) -> str:
+    """Spreadsheet rows as CSV text, one ``# Sheet:`` block per worksheet.
+
+    .xlsx is streamed with openpyxl in read-only mode and .csv with the csv
+    module; pandas is only imported for legacy .xls workbooks.
+    """
     try:
-        df_dict = pd.read_excel(path, sheet_name=None) if path.lower().endswith((".xlsx", ".xls")) else {"Sheet1": pd.read_csv(path)}
-        parts = []
-        for name, df in df_dict.items():
-            parts.append(f"# Sheet: {name}\n")
-            parts.append(df.to_csv(index=False))
-        return "\n".join(parts)
+        buf = io.StringIO()
+        lower = path.lower()
+        if lower.endswith(".xlsx") and OPENPYXL_AVAILABLE:
+            wb = load_workbook(path, read_only=True, data_only=True)
+            try:
+                for ws in wb.worksheets:
+                    buf.write(f"# Sheet: {ws.title}\n")
+                    writer = csv.writer(buf, lineterminator="\n")
+                    for row in ws.iter_rows(values_only=True):
+                        writer.writerow(row)
+                    buf.write("\n")
+            finally:
+                wb.close()
+        elif lower.endswith(".csv"):
+            buf.write("# Sheet: Sheet1\n")
+            writer = csv.writer(buf, lineterminator="\n")
+            with open(path, newline="", encoding="utf-8", errors="replace") as f:
+                writer.writerows(csv.reader(f))
+        else:
+            import pandas as pd
+            for name, df in pd.read_excel(path, sheet_name=None).items():
+                buf.write(f"# Sheet: {name}\n")
+                buf.write(df.to_csv(index=False))
+                buf.write("\n")
+        return buf.getvalue()
     except Exception as e:
         logging.error(f"Spreadsheet parse failed for {path}: {e}")
         return ""
 
 
 def extract_text_html(path: str) -> str:
-    if not BS4_AVAILABLE:
+    if not (SELECTOLAX_AVAILABLE or BS4_AVAILABLE):
         return ""
     try:
         html = read_binary(path).decode('utf-8', errors='ignore')
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(html)
+            tree.strip_tags(["script", "style", "noscript"])
+            node = tree.body or tree.root
+            return node.text(separator=" ", strip=True) if node is not None else ""
         soup = BeautifulSoup(html, 'lxml')
         return soup.get_text(" ", strip=True)
     except Exception:
@@ -236,18 +585,43 @@ EXTENSION_MAP = {
 }
 
 
-def extract_text(path: str) -> str:
-    ext = os.path.splitext(path)[1].lower()
-    extractor = EXTENSION_MAP.get(ext)
-    if extractor is not None:
-        text = extractor(path)
+IMAGE_EXTS = frozenset(ext for ext, fn in EXTENSION_MAP.items() if fn is extract_text_image)
+
+
+# Single-call prompt budget; longer documents are map-reduced in overlapping
+# chunks (see llm_extract_procurement_chunked) up to MAX_DOCUMENT_CHARS
+MAX_PROMPT_CHARS = 40000
+MAX_DOCUMENT_CHARS = int(os.getenv("SUMMARIZER_MAX_CHARS", "400000"))
+CHUNK_CHARS = 15000
+CHUNK_OVERLAP = 3000
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def extract_text(path: str, raw_text: Optional[str] = None, max_chars: int = MAX_PROMPT_CHARS,
+                 use_regex_clean: bool = False) -> str:
+    """Extract and normalize a document's text (``raw_text`` skips extraction, e.g. batch OCR output).
+
+    Whitespace is collapsed with str.split/join (C-level); ``use_regex_clean``
+    selects the older re.sub pass for comparison.
+    """
+    if raw_text is not None:
+        text = raw_text
     else:
-        text = extract_text_generic(path)
+        ext = os.path.splitext(path)[1].lower()
+        extractor = EXTENSION_MAP.get(ext)
+        if extractor is not None:
+            text = extractor(path)
+        else:
+            text = extract_text_generic(path)
     # Clean up huge whitespace and limit extremely long docs (to control token cost)
-    text = re.sub(r"\s+", " ", text).strip()
-    if len(text) > 40000:
-        logging.info(f"Truncating long text for {path} to 40k characters.")
-        text = text[:40000]
+    if use_regex_clean:
+        text = _WHITESPACE_RE.sub(" ", text).strip()
+    else:
+        text = " ".join(text.split())
+    if len(text) > max_chars:
+        logging.info(f"Truncating long text for {path} to {max_chars // 1000}k characters.")
+        text = text[:max_chars]
     return text
 
 
@@ -263,43 +637,50 @@ if not OPENAI_API_KEY:
     logging.warning("OPENAI_API_KEY is not set. Set it before running to enable LLM summarization.")
 
 
-def llm_extract_procurement(text: str, model: str = OPENAI_MODEL) -> Dict[str, Any]:
-    """Ask the LLM to extract structured procurement info from free text.
-    Uses Chat Completions with JSON mode for consistent parsing.
-    """
+# One pooled session for all LLM calls: keeps TLS connections alive across
+# documents and threads, and retries 429/5xx with backoff (honoring Retry-After)
+HTTP_POOL_SIZE = int(os.getenv("SUMMARIZER_HTTP_POOL", "32"))
+LLM_MAX_RETRIES = 3
+# Hard per-call budget for document text, counted in model tokens
+MAX_PROMPT_TOKENS = int(os.getenv("SUMMARIZER_MAX_PROMPT_TOKENS", "12000"))
+# Stream completions (SSE) so the body is consumed while the model is still generating
+LLM_STREAM = os.getenv("SUMMARIZER_STREAM", "1").lower() not in ("0", "false", "no")
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retry = Retry(
+                total=LLM_MAX_RETRIES,
+                backoff_factor=1.0,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"POST"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Content-Type": "application/json"})
+            _session = session
+        return _session
+
+
+def _build_llm_request(text: str, model: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """URL, headers and JSON payload for the procurement extraction call."""
     url = f"{OPENAI_BASE}/chat/completions"
+    text = truncate_to_tokens(text, MAX_PROMPT_TOKENS, model)
 
     system = (
         "You are a precise procurement analyst. Extract procurement-relevant details from scope documents."
         " Always return STRICT JSON that matches the provided schema."
     )
 
-    schema_hint = {
-        "type": "object",
-        "properties": {
-            "items": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "product_name": {"type": ["string", "null"]},
-                        "category": {"type": ["string", "null"]},
-                        "budget": {"type": ["string", "number", "null"]},
-                        "quantity": {"type": ["string", "number", "null"]},
-                        "timeline": {"type": ["string", "null"]},
-                        "notes": {"type": ["string", "null"]},
-                        "summary": {"type": ["string", "null"]},
-                    },
-                    "required": ["summary"],
-                    "additionalProperties": False,
-                },
-            },
-            "overall_summary": {"type": "string"},
-        },
-        "required": ["items", "overall_summary"],
-        "additionalProperties": False,
-    }
-
     user = (
         "Extract procurement details. Focus on product name, category, budget, quantity,"
         " timeline/milestones, and any constraints/specs. If multiple products are mentioned,"
@@ -316,35 +697,481 @@ def llm_extract_procurement(text: str, model: str = OPENAI_MODEL) -> Dict[str, A
         ],
         "temperature": 0.0,
     }
+    if LLM_STREAM:
+        payload["stream"] = True
 
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {OPENAI_API_KEY}",
     }
+    return url, headers, payload
+
+
+class _StreamedContent:
+    """Accumulates Chat Completions SSE deltas as they arrive off the wire."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+
+    def feed(self, line: Any) -> bool:
+        """Consume one SSE line; True once the stream's [DONE] marker arrives."""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data:"):
+            return False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return True
+        for choice in json_loads(data).get("choices") or []:
+            piece = (choice.get("delta") or {}).get("content")
+            if piece:
+                self.parts.append(piece)
+        return False
+
+    def response(self) -> Dict[str, Any]:
+        """The equivalent non-streamed response body, for _parse_llm_response."""
+        return {"choices": [{"message": {"content": "".join(self.parts)}}]}
+
+
+def _parse_llm_response(data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """Parsed result, and whether the model returned valid JSON."""
+    content = data["choices"][0]["message"]["content"]
+    logging.debug(f"LLM response content: {content[:500]}")
+    try:
+        result = json_loads(content)
+        logging.debug(f"Parsed JSON items: {len(result.get('items', []))}")
+        return result, True
+    except ValueError as e:  # json/orjson JSONDecodeError
+        logging.error(f"JSON decode error: {e}")
+        # Best-effort fallback: wrap in a generic container
+        return {"items": [{"summary": content}], "overall_summary": content}, False
+
 
+# ---------------------------
+# Result cache (sqlite), keyed on sha256(prompt version + request settings + model + normalized text)
+# ---------------------------
+
+# PROC_CACHE: "exact" (default) reuses results for identical text, "semantic"
+# also reuses them for near-duplicates by embedding cosine similarity, "off"
+# disables caching
+PROC_CACHE = os.getenv("PROC_CACHE", "exact").lower()
+PROC_CACHE_PATH = os.getenv("PROC_CACHE_PATH", ".procurement_cache.sqlite3")
+PROC_CACHE_TTL = int(os.getenv("PROC_CACHE_TTL", "604800"))  # one week
+# Bump when the prompt in _build_llm_request changes so cached results built from it are not reused
+PROC_PROMPT_VERSION = "1"
+PROC_CACHE_SIMILARITY = float(os.getenv("PROC_CACHE_SIMILARITY", "0.97"))
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_MAX_CHARS = 20000  # keep embedding input well inside the model's token limit
+
+
+class _ResultCache:
+    """Thread-safe sqlite store of LLM results (plus optional embeddings)."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results_v2 ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, result TEXT NOT NULL, embedding TEXT, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM results_v2 WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json_loads(row[0]) if row else None
+
+    def nearest(self, model: str, embedding: List[float], threshold: float) -> Optional[Dict[str, Any]]:
+        """Cached result whose embedding has cosine >= threshold, best first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result, embedding FROM results_v2 WHERE model = ? AND embedding IS NOT NULL AND expires_at > ?",
+                (model, time.time()),
+            ).fetchall()
+        best, best_score = None, threshold
+        for result, stored in rows:
+            score = _cosine(embedding, json_loads(stored))
+            if score >= best_score:
+                best, best_score = result, score
+        return json_loads(best) if best is not None else None
+
+    def put(self, key: str, model: str, result: Dict[str, Any], embedding: Optional[List[float]] = None) -> None:
+        with self._lock:
+            now = time.time()
+            self._conn.execute("DELETE FROM results_v2 WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results_v2 (key, model, result, embedding, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, json_dumps(result).decode("utf-8"), json_dumps(embedding).decode("utf-8") if embedding else None,
+                 now + PROC_CACHE_TTL),
+            )
+            self._conn.commit()
+
+
+_result_cache: Optional[_ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def _get_result_cache() -> _ResultCache:
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = _ResultCache(PROC_CACHE_PATH)
+        return _result_cache
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _embed(text: str) -> Optional[List[float]]:
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=120)
+        r = _get_session().post(
+            f"{OPENAI_BASE}/embeddings",
+            headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+            data=json_dumps({"model": EMBEDDING_MODEL, "input": text[:EMBEDDING_MAX_CHARS]}),
+            timeout=60,
+        )
         r.raise_for_status()
-        data = r.json()
-        content = data["choices"][0]["message"]["content"]
-        logging.debug(f"LLM response content: {content[:500]}")
-        try:
-            result = json.loads(content)
-            logging.debug(f"Parsed JSON items: {len(result.get('items', []))}")
-            return result
-        except json.JSONDecodeError as e:
-            logging.error(f"JSON decode error: {e}")
-            # Best-effort fallback: wrap in a generic container
-            return {"items": [{"summary": content}], "overall_summary": content}
+        return json_loads(r.content)["data"][0]["embedding"]
+    except Exception as e:
+        logging.warning(f"Embedding for semantic cache failed: {e}")
+        return None
+
+
+def _cache_scope(model: str) -> str:
+    """Everything that shapes the request besides the text itself; stored as the row's model."""
+    return f"{PROC_PROMPT_VERSION}|{PROC_COMPRESS}|{PROC_COMPRESS_MODEL}|{PROC_COMPRESS_RATE}|{MAX_PROMPT_TOKENS}|{model}"
+
+
+def _cache_lookup(text: str, model: str) -> Tuple[Optional[Dict[str, Any]], str, Optional[List[float]]]:
+    """(cached result or None, cache key, embedding computed for the semantic tier).
+
+    Cache errors (unwritable directory, locked file) are logged and treated as a miss.
+    """
+    scope = _cache_scope(model)
+    key = hashlib.sha256(f"{scope}\n{text.strip()}".encode("utf-8")).hexdigest()
+    try:
+        cache = _get_result_cache()
+        hit = cache.get(key)
+        if hit is not None or PROC_CACHE != "semantic":
+            return hit, key, None
+        embedding = _embed(text)
+        if embedding is not None:
+            hit = cache.nearest(scope, embedding, PROC_CACHE_SIMILARITY)
+        return hit, key, embedding
+    except Exception as e:
+        logging.warning(f"Could not read LLM result cache: {e}")
+        return None, key, None
+
+
+def _cache_store(key: str, model: str, result: Dict[str, Any], embedding: Optional[List[float]]) -> None:
+    try:
+        _get_result_cache().put(key, _cache_scope(model), result, embedding)
+    except Exception as e:
+        logging.warning(f"Could not cache LLM result: {e}")
+
+
+# ---------------------------
+# Prompt compression
+# ---------------------------
+
+# PROC_COMPRESS (opt-in): "auto" prunes tokens with LLMLingua-2 when installed,
+# "keywords" keeps only procurement-relevant sentences, "off" (default) sends
+# the text unchanged. PROC_COMPRESS_MODEL names the LLMLingua-2 token classifier.
+PROC_COMPRESS = os.getenv("PROC_COMPRESS", "off").lower()
+PROC_COMPRESS_RATE = float(os.getenv("PROC_COMPRESS_RATE", "0.4"))
+PROC_COMPRESS_MODEL = os.getenv("PROC_COMPRESS_MODEL", "microsoft/llmlingua-2-xlm-roberta-large-meetingbank")
+
+_PROCUREMENT_KEYWORD_RE = re.compile(
+    r"\$|\b(?:qty|quantity|budget|price|usd|deadline|by \d|due|specs?|specification|model)\b",
+    re.IGNORECASE,
+)
+_SEGMENT_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+_compressor: Optional["PromptCompressor"] = None
+_compressor_lock = threading.Lock()
+
+
+def keyword_filter(text: str) -> str:
+    """Keep only sentences/lines mentioning quantities, prices, deadlines or specs."""
+    kept = [seg for seg in _SEGMENT_SPLIT_RE.split(text) if _PROCUREMENT_KEYWORD_RE.search(seg)]
+    return " ".join(kept) if kept else text
+
+
+def compress_text(text: str) -> str:
+    """Shrink document text before it goes into the prompt (see PROC_COMPRESS)."""
+    global _compressor
+    if PROC_COMPRESS == "keywords":
+        return keyword_filter(text)
+    if PROC_COMPRESS != "auto" or not LLMLINGUA_AVAILABLE:
+        return text
+    try:
+        with _compressor_lock:
+            if _compressor is None:
+                _compressor = PromptCompressor(model_name=PROC_COMPRESS_MODEL, use_llmlingua2=True)
+            compressed = _compressor.compress_prompt(text, rate=PROC_COMPRESS_RATE)["compressed_prompt"]
+        logging.debug(f"Compressed prompt text {len(text)} -> {len(compressed)} chars")
+        return compressed
+    except Exception as e:
+        logging.warning(f"Prompt compression failed, sending full text: {e}")
+        return text
+
+
+def llm_extract_procurement(text: str, model: str = OPENAI_MODEL) -> Dict[str, Any]:
+    """Ask the LLM to extract structured procurement info from free text.
+    Uses Chat Completions with JSON mode for consistent parsing.
+    """
+    use_cache = PROC_CACHE in ("exact", "semantic")
+    if use_cache:
+        hit, key, embedding = _cache_lookup(text, model)
+        if hit is not None:
+            logging.info("Procurement extraction served from cache")
+            return hit
+
+    url, headers, payload = _build_llm_request(compress_text(text), model)
+    try:
+        with _get_session().post(url, headers=headers, data=json_dumps(payload), timeout=120, stream=LLM_STREAM) as r:
+            r.raise_for_status()
+            if LLM_STREAM:
+                streamed = _StreamedContent()
+                for line in r.iter_lines():
+                    if streamed.feed(line):
+                        break
+                data = streamed.response()
+            else:
+                data = json_loads(r.content)
+        result, ok = _parse_llm_response(data)
+        if ok and use_cache:
+            _cache_store(key, model, result, embedding)
+        return result
+    except Exception as e:
+        logging.error(f"LLM extraction failed: {e}")
+        return {"items": [{"summary": f"Error: {e}"}], "overall_summary": f"Error: {e}"}
+
+
+# Shared async client, recreated if used from a different event loop
+_async_client: Optional["httpx.AsyncClient"] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_async_client() -> "httpx.AsyncClient":
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=120,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def llm_extract_procurement_async(text: str, model: str = OPENAI_MODEL, client: Optional["httpx.AsyncClient"] = None) -> Dict[str, Any]:
+    """Async llm_extract_procurement over a pooled (HTTP/2 when available) httpx client.
+
+    Retries 429/5xx with exponential backoff, honoring Retry-After. Without
+    httpx, runs the sync version in a worker thread.
+    """
+    if not HTTPX_AVAILABLE:
+        return await asyncio.to_thread(llm_extract_procurement, text, model)
+
+    use_cache = PROC_CACHE in ("exact", "semantic")
+    if use_cache:
+        hit, key, embedding = await asyncio.to_thread(_cache_lookup, text, model)
+        if hit is not None:
+            logging.info("Procurement extraction served from cache")
+            return hit
+
+    compressed = await asyncio.to_thread(compress_text, text)
+    url, headers, payload = _build_llm_request(compressed, model)
+    client = client or _get_async_client()
+    try:
+        body = json_dumps(payload)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            async with client.stream("POST", url, headers=headers, content=body) as r:
+                if r.status_code in (429, 500, 502, 503, 504) and attempt < LLM_MAX_RETRIES:
+                    retry_after = r.headers.get("retry-after")
+                    delay = float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else 2.0 ** attempt
+                    logging.warning(f"LLM call returned {r.status_code}; retrying in {delay:.1f}s")
+                else:
+                    r.raise_for_status()
+                    if LLM_STREAM:
+                        streamed = _StreamedContent()
+                        async for line in r.aiter_lines():
+                            if streamed.feed(line):
+                                break
+                        data = streamed.response()
+                    else:
+                        data = json_loads(await r.aread())
+                    result, ok = _parse_llm_response(data)
+                    if ok and use_cache:
+                        await asyncio.to_thread(_cache_store, key, model, result, embedding)
+                    return result
+            await asyncio.sleep(delay)
     except Exception as e:
         logging.error(f"LLM extraction failed: {e}")
         return {"items": [{"summary": f"Error: {e}"}], "overall_summary": f"Error: {e}"}
 
 
+# ---------------------------
+# Map-reduce for long documents
+# ---------------------------
+
+def _chunk_text(text: str) -> List[str]:
+    step = CHUNK_CHARS - CHUNK_OVERLAP
+    return [text[i:i + CHUNK_CHARS] for i in range(0, max(len(text) - CHUNK_OVERLAP, 1), step)]
+
+
+def _merge_items(partials: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Concatenate chunk items, dropping repeats of the same (product_name, category)."""
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for partial in partials:
+        items = partial.get("items") or []
+        if not isinstance(items, list):
+            items = [items]
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            name, category = item.get("product_name"), item.get("category")
+            if name:
+                key = (str(name).strip().lower(), str(category or "").strip().lower())
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged.append(item)
+    return merged
+
+
+def _reduce_summaries(summaries: List[str], model: str) -> str:
+    """One short LLM call folding per-chunk summaries into a single overall summary."""
+    summaries = [s for s in summaries if s and not s.startswith("Error:")]
+    if len(summaries) <= 1:
+        return summaries[0] if summaries else ""
+    joined = "\n".join(f"- {s}" for s in summaries)
+    payload = {
+        "model": model,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": "You merge partial summaries of one procurement document. Return STRICT JSON."},
+            {"role": "user", "content": (
+                "These summaries cover consecutive parts of the same document. Combine them into one concise"
+                ' overall summary without repetition. Return {"overall_summary": str}.'
+                f"\n\nSUMMARIES:\n{joined}"
+            )},
+        ],
+        "temperature": 0.0,
+    }
+    try:
+        r = _get_session().post(
+            f"{OPENAI_BASE}/chat/completions",
+            headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+            data=json_dumps(payload),
+            timeout=120,
+        )
+        r.raise_for_status()
+        result, ok = _parse_llm_response(json_loads(r.content))
+        if ok and result.get("overall_summary"):
+            return result["overall_summary"]
+    except Exception as e:
+        logging.error(f"Summary reduce step failed: {e}")
+    return " ".join(summaries)
+
+
+# Most extraction calls in flight at once from the chunked and async fan-outs
+# below; the thread semaphore caps the sync path across concurrent documents
+LLM_CONCURRENCY = int(os.getenv("SUMMARIZER_LLM_CONCURRENCY", "4"))
+
+_llm_thread_semaphore = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+def _bounded_extract_sync(text: str, model: str) -> Dict[str, Any]:
+    with _llm_thread_semaphore:
+        return llm_extract_procurement(text, model)
+
+
+def llm_extract_procurement_chunked(text: str, model: str = OPENAI_MODEL) -> Dict[str, Any]:
+    """llm_extract_procurement for documents of any length.
+
+    Texts over MAX_PROMPT_CHARS are split into overlapping chunks that are
+    extracted in parallel (at most LLM_CONCURRENCY calls at once), then
+    items are merged and summaries reduced.
+    """
+    if len(text) <= MAX_PROMPT_CHARS:
+        return llm_extract_procurement(text, model)
+    chunks = _chunk_text(text)
+    logging.info(f"Map-reducing {len(text)} chars in {len(chunks)} chunks")
+    with ThreadPoolExecutor(max_workers=min(len(chunks), LLM_CONCURRENCY)) as executor:
+        partials = list(executor.map(lambda chunk: _bounded_extract_sync(chunk, model), chunks))
+    overall = _reduce_summaries([p.get("overall_summary") or "" for p in partials], model)
+    return {"items": _merge_items(partials), "overall_summary": overall}
+
+
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    return _llm_semaphore
+
+
+async def _bounded_extract(text: str, model: str) -> Dict[str, Any]:
+    async with _get_llm_semaphore():
+        return await llm_extract_procurement_async(text, model)
+
+
+async def llm_extract_procurement_chunked_async(text: str, model: str = OPENAI_MODEL) -> Dict[str, Any]:
+    """Async llm_extract_procurement_chunked; at most LLM_CONCURRENCY chunk calls run at once."""
+    if len(text) <= MAX_PROMPT_CHARS:
+        return await llm_extract_procurement_async(text, model)
+    chunks = _chunk_text(text)
+    logging.info(f"Map-reducing {len(text)} chars in {len(chunks)} chunks")
+    partials = await asyncio.gather(*(_bounded_extract(chunk, model) for chunk in chunks))
+    overall = await asyncio.to_thread(_reduce_summaries, [p.get("overall_summary") or "" for p in partials], model)
+    return {"items": _merge_items(partials), "overall_summary": overall}
+
+
+async def llm_extract_procurement_many(texts: List[str], model: str = OPENAI_MODEL) -> List[Dict[str, Any]]:
+    """Run extraction for many documents, LLM_CONCURRENCY at a time (results in input order)."""
+    return list(await asyncio.gather(*(_bounded_extract(t, model) for t in texts)))
+
+
 # ---------------------------
 # Core pipeline
 # ---------------------------
 
+# Parallelism for batch runs: threads overlap file I/O and LLM round-trips,
+# a process pool gives CPU-bound extractors (pypdf, OCR, pptx) real cores
+MAX_WORKERS = int(os.getenv("SUMMARIZER_WORKERS", "16"))
+CPU_BOUND_EXTS = frozenset({".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".pptx"})
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Each worker warms one tesserocr engine up front for scanned PDF pages
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, initializer=warm_tess_pool, initargs=(1,))
+        return _process_pool
+
+
+def _extract_text_offloaded(path: str, max_chars: int = MAX_PROMPT_CHARS) -> str:
+    """Run CPU-bound extractors in the process pool, everything else inline."""
+    if os.path.splitext(path)[1].lower() in CPU_BOUND_EXTS:
+        return _get_process_pool().submit(extract_text, path, None, max_chars).result()
+    return extract_text(path, max_chars=max_chars)
+
+
 @dataclass
 class DocResult:
     document_path: str
@@ -352,20 +1179,28 @@ class DocResult:
     overall_summary: str
 
 
-def process_path(path: str) -> DocResult:
-    text = extract_text(path)
+def extract_document_text(path: str, use_process_pool: bool = False, ocr_text: Optional[str] = None) -> str:
+    if ocr_text is not None:
+        return extract_text(path, raw_text=ocr_text, max_chars=MAX_DOCUMENT_CHARS)
+    if use_process_pool:
+        return _extract_text_offloaded(path, MAX_DOCUMENT_CHARS)
+    return extract_text(path, max_chars=MAX_DOCUMENT_CHARS)
+
+
+def summarize_text(path: str, text: str) -> DocResult:
     if not text:
         return DocResult(document_path=path, items=[{"summary": "No text could be extracted."}], overall_summary="No extractable text.")
 
     if not OPENAI_API_KEY:
-        # Offline mode: simple heuristic stub
+        # Offline mode: simple heuristic stub built from procurement-relevant sentences
+        summary = keyword_filter(text)
         return DocResult(
             document_path=path,
-            items=[{"product_name": None, "category": None, "budget": None, "quantity": None, "timeline": None, "notes": None, "summary": text[:500] + ("..." if len(text) > 500 else "")}],
+            items=[{"product_name": None, "category": None, "budget": None, "quantity": None, "timeline": None, "notes": None, "summary": summary[:500] + ("..." if len(summary) > 500 else "")}],
             overall_summary="Set OPENAI_API_KEY to enable LLM-based structured extraction.",
         )
 
-    result = llm_extract_procurement(text)
+    result = llm_extract_procurement_chunked(text)
     # Normalize keys and types
     items = result.get("items") or []
     if not isinstance(items, list):
@@ -374,12 +1209,31 @@ def process_path(path: str) -> DocResult:
     return DocResult(document_path=path, items=items, overall_summary=overall)
 
 
+def process_path(path: str, use_process_pool: bool = False, ocr_text: Optional[str] = None) -> DocResult:
+    return summarize_text(path, extract_document_text(path, use_process_pool, ocr_text))
+
+
+def _error_result(path: str, e: Exception) -> Dict[str, Any]:
+    return {
+        "document_path": path,
+        "items": [{"summary": f"Error: {e}"}],
+        "overall_summary": "",
+    }
+
+
+_SUPPORTED_EXTS = frozenset(EXTENSION_MAP)
+
+
 def iter_input_paths(args: argparse.Namespace) -> Iterable[str]:
     if args.paths:
         for p in args.paths:
             if os.path.isdir(p):
-                for ext in EXTENSION_MAP.keys():
-                    yield from glob.glob(os.path.join(p, f"**/*{ext}"), recursive=True)
+                # One walk of the tree for all extensions (hidden entries skipped, as glob did)
+                for root, dirs, files in os.walk(p):
+                    dirs[:] = [d for d in dirs if not d.startswith(".")]
+                    for name in files:
+                        if not name.startswith(".") and os.path.splitext(name)[1].lower() in _SUPPORTED_EXTS:
+                            yield os.path.join(root, name)
             else:
                 yield p
 
@@ -390,28 +1244,68 @@ def main():
     parser.add_argument('--out', help='Write all results to a JSON file')
     parser.add_argument('--print', dest='do_print', action='store_true', help='Print results to stdout')
     parser.add_argument('--model', default=os.getenv('OPENAI_MODEL', OPENAI_MODEL), help='Override model name')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Documents processed concurrently')
     args = parser.parse_args()
 
-    results: List[Dict[str, Any]] = []
-    for path in iter_input_paths(args):
-        logging.info(f"Processing {path}")
-        try:
-            res = process_path(path)
-            results.append(asdict(res))
-        except Exception as e:
-            logging.exception(f"Failed on {path}: {e}")
-            results.append({
-                "document_path": path,
-                "items": [{"summary": f"Error: {e}"}],
-                "overall_summary": "",
-            })
+    paths = list(iter_input_paths(args))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(paths)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        # OCR all images up front in a few tesseract batches (one per core)
+        image_paths = [p for p in paths if os.path.splitext(p)[1].lower() in IMAGE_EXTS]
+        ocr_texts: Dict[str, str] = {}
+        if image_paths:
+            n_batches = min(len(image_paths), os.cpu_count() or 1)
+            batches = [image_paths[i::n_batches] for i in range(n_batches)]
+            for batch_result in executor.map(extract_text_images_batch, batches):
+                ocr_texts.update(batch_result)
+
+        texts: List[Optional[str]] = [None] * len(paths)
+        futures = {}
+        for index, path in enumerate(paths):
+            logging.info(f"Processing {path}")
+            futures[executor.submit(extract_document_text, path, True, ocr_texts.get(path))] = index
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                texts[index] = future.result()
+            except Exception as e:
+                logging.exception(f"Failed on {paths[index]}: {e}")
+                results[index] = _error_result(paths[index], e)
+
+        # One LLM call per distinct text; duplicate uploads share the result
+        buckets: Dict[str, List[int]] = defaultdict(list)
+        for index, text in enumerate(texts):
+            if text is not None:
+                buckets[hashlib.sha256(text.encode("utf-8")).hexdigest()].append(index)
+        duplicates = sum(len(indices) - 1 for indices in buckets.values())
+        if duplicates:
+            logging.info(f"{duplicates} document(s) duplicate another in this batch; reusing results")
+
+        futures = {}
+        for indices in buckets.values():
+            first = indices[0]
+            futures[executor.submit(summarize_text, paths[first], texts[first])] = indices
+        for future in as_completed(futures):
+            indices = futures[future]
+            try:
+                doc = future.result()
+            except Exception as e:
+                logging.exception(f"Failed on {paths[indices[0]]}: {e}")
+                for index in indices:
+                    results[index] = _error_result(paths[index], e)
+                continue
+            for index in indices:
+                results[index] = asdict(replace(doc, document_path=paths[index]))
+
+    if _process_pool is not None:
+        _process_pool.shutdown()
 
     if args.do_print or not args.out:
-        print(json.dumps(results, indent=2, ensure_ascii=False))
+        print(json_dumps(results, indent=True).decode("utf-8"))
 
     if args.out:
-        with open(args.out, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(args.out, 'wb') as f:
+            f.write(json_dumps(results, indent=True))
         logging.info(f"Wrote {args.out}")
 
 
@@ -9,6 +9,11 @@ from typing import List, Dict, Any, Optional
 from openai import OpenAI
 import os
 
+from utils.token_utils import truncate_to_tokens
+
+# Links and prices in one alternation so the text is scanned once
+_LINK_OR_PRICE_RE = re.compile(r'(?P<url>https://[^\s<>"]+)|(?P<price>\$[\d,]+(?:\.\d{2})?)')
+
 def parse_vendors_with_llm(search_output: str, client: OpenAI) -> List[Dict[str, Any]]:
     """
     Use LLM to parse vendor search output into structured JSON.
@@ -67,7 +72,7 @@ Example format:
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": parse_prompt},
-                {"role": "user", "content": f"Parse this search output:\n\n{search_output[:8000]}"}  # Limit to 8k chars
+                {"role": "user", "content": f"Parse this search output:\n\n{truncate_to_tokens(search_output, 2000)}"}  # Limit to 2k tokens (~8k chars)
             ]
         )
         
@@ -102,11 +107,14 @@ def parse_vendors_simple(search_output: str) -> List[Dict[str, Any]]:
     """
     vendors = []
     
-    # Try to find HTTPS links
-    links = re.findall(r'https://[^\s<>"]+', search_output)
-    
-    # Try to find prices ($X,XXX or $XXX)
-    prices = re.findall(r'\$[\d,]+(?:\.\d{2})?', search_output)
+    # Collect HTTPS links and prices ($X,XXX or $XXX) in a single pass
+    links = []
+    prices = []
+    for match in _LINK_OR_PRICE_RE.finditer(search_output):
+        if match.lastgroup == "url":
+            links.append(match.group())
+        else:
+            prices.append(match.group())
     
     # Simple heuristic: if we have links and prices, create vendor entries
     for i, link in enumerate(links[:10]):  # Max 10
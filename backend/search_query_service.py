@@ -11,11 +11,18 @@ Clean, minimal, uses responses.create with strict JSON schema.
 
 import os
 import json
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from openai import OpenAI
 
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-2024-08-06")
 
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> OpenAI:
+    """Return a shared OpenAI client per API key so HTTP connections are pooled."""
+    return OpenAI(api_key=api_key)
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # STRICT JSON SCHEMA
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -114,7 +121,7 @@ def generate_search_query(selection: Dict[str, Any], *, model: str = MODEL, key:
             "display_subtitle": "API key not configured"
         }
     
-    client = OpenAI(api_key=api_key)
+    client = _get_client(api_key)
     
     try:
         # Use simple JSON mode (compatible with all SDK versions)
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import os
@@ -40,12 +40,14 @@ from product_parser_service import (
 from procurement_summarizer import (
     extract_text,
     process_path,
-    llm_extract_procurement
+    llm_extract_procurement_chunked_async,
+    MAX_DOCUMENT_CHARS
 )
 
 # Import KPA One-Flow services
 from services.procurement_intake import run_intake
-from services.procurement_recommend import run_recommendations
+from services.procurement_recommend import run_recommendations_async, stream_recommendations
+from services.prompt_compact import compact_specs
 from utils.scope_utils import merge_scope_with_answers, normalize_scope
 from utils.store import SessionStore
 from utils.recs_utils import postprocess_recs
@@ -109,11 +111,11 @@ def create_structured_summary(session: dict, answers: dict, intake_result: dict)
     sections.append(f"- Fit within budget: ${session.get('budget_usd', 0):,.2f} per unit")
     sections.append(f"- Meet quantity requirement: {session.get('quantity', 'N/A')} units")
     
-    if answers:
+    specs = compact_specs(answers.values()) if answers else []
+    if specs:
         sections.append("- Address the following specific requirements:")
-        for question, answer in answers.items():
-            if answer and answer.strip() and answer.lower() not in ['na', 'n/a', 'no', 'none']:
-                sections.append(f"  • {answer}")
+        for spec in specs:
+            sections.append(f"  • {spec}")
     
     return "\n".join(sections)
 
@@ -660,11 +662,11 @@ async def files_analyze_enhanced(files: List[UploadFile] = File(...)):
             
             # Extract text using procurement summarizer
             try:
-                text = extract_text(str(temp_path))
+                text = extract_text(str(temp_path), max_chars=MAX_DOCUMENT_CHARS)
                 
                 # Use LLM to extract structured procurement data
                 if text and os.getenv("OPENAI_API_KEY"):
-                    procurement_data = llm_extract_procurement(text)
+                    procurement_data = await llm_extract_procurement_chunked_async(text)
                     results.append({
                         "id": f"att-{idx+1}",
                         "name": f.filename or "upload",
@@ -1517,11 +1519,12 @@ async def regenerate(session_id: str):
         
         logger.info(f"Regenerating with structured summary: {len(structured_summary)} characters")
         
-        recs = run_recommendations(
+        recs = await run_recommendations_async(
             session["product_name"], 
             session["budget_usd"], 
             session["quantity"], 
-            structured_summary
+            structured_summary,
+            use_cache=False
         )
         recs = postprocess_recs(recs)
         
@@ -1624,7 +1627,7 @@ async def generate_final_recommendations(session_id: str):
         logger.info(f"Structured summary preview: {structured_summary[:300]}...")
         
         # Generate final recommendations using structured summary
-        recs = run_recommendations(
+        recs = await run_recommendations_async(
             session["product_name"],
             session["budget_usd"],
             session["quantity"],
@@ -1658,6 +1661,52 @@ async def generate_final_recommendations(session_id: str):
         )
 
 
+@app.post("/api/session/{session_id}/generate_recommendations/stream")
+async def stream_final_recommendations(session_id: str):
+    """
+    Streaming variant of generate_recommendations: NDJSON, one line per
+    recommendation as the model completes it, then a final "complete" line
+    with the postprocessed pack (same shape as the non-streaming response).
+    """
+    session = kpa_session_store.get(session_id)
+    if not session:
+        raise HTTPException(404, "Session not found or expired")
+    
+    structured_summary = session.get("structured_summary")
+    if not structured_summary:
+        structured_summary = create_structured_summary(
+            session, 
+            session.get("answers") or {}, 
+            session.get("intake_result", {})
+        )
+    
+    async def events():
+        async for event in stream_recommendations(
+            session["product_name"],
+            session["budget_usd"],
+            session["quantity"],
+            structured_summary
+        ):
+            if event["type"] == "complete":
+                recs = postprocess_recs(event["recommendations"])
+                session.update({
+                    "recommendations": recs,
+                    "version": (session.get("version") or 0) + 1,
+                    "ts": time.time()
+                })
+                kpa_session_store.set(session_id, session)
+                logger.info(f"Final recommendations streamed for session {session_id}: {len(recs.get('recommendations', []))} options")
+                event = {
+                    "type": "complete",
+                    "session_id": session_id,
+                    "version": session["version"],
+                    "recommendations": recs
+                }
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 # ----------------------------------------------------------------------------
 # POST-CART PHASE ENDPOINTS
 # ----------------------------------------------------------------------------
@@ -1670,12 +1719,23 @@ async def evaluate_g1_endpoint(req: Request):
     """Evaluate G1 decision gate for procurement readiness"""
     try:
         body = await req.json()
-        result = post_cart_service.evaluate_g1(body)
-        return JSONResponse(result)
+        result = post_cart_service.evaluate_g1_json(body)
+        return Response(content=result, media_type="application/json")
     except Exception as e:
         logger.error(f"Error evaluating G1: {e}", exc_info=True)
         return JSONResponse({"error": f"Error evaluating G1: {str(e)}"}, status_code=500)
 
+@app.post("/api/post-cart/g1-evaluate/fast")
+async def evaluate_g1_fast_endpoint(req: Request):
+    """Quick G1 pass/fail check for UI polling (lists only the first pricing gap)"""
+    try:
+        body = await req.json()
+        result = post_cart_service.evaluate_g1_fast(body)
+        return JSONResponse(result)
+    except Exception as e:
+        logger.error(f"Error evaluating G1 (fast): {e}", exc_info=True)
+        return JSONResponse({"error": f"Error evaluating G1: {str(e)}"}, status_code=500)
+
 @app.post("/api/post-cart/g1-explain")
 async def explain_g1_endpoint(req: Request):
     """Return a plain-language explanation and fixes for a given G1 result.
@@ -1761,8 +1821,8 @@ async def submit_approval_action_endpoint(pr_id: str, req: Request):
 async def get_pr_status_endpoint(pr_id: str):
     """Get PR status"""
     try:
-        result = post_cart_service.get_pr_status(pr_id)
-        return JSONResponse(result)
+        result = post_cart_service.get_pr_status_json(pr_id)
+        return Response(content=result, media_type="application/json")
     except Exception as e:
         logger.error(f"Error getting PR status: {e}", exc_info=True)
         return JSONResponse({"error": f"Error getting PR status: {str(e)}"}, status_code=500)
@@ -1832,8 +1892,8 @@ async def send_rfq_endpoint(rfq_id: str):
 async def get_rfq_status_endpoint(rfq_id: str):
     """Get RFQ status and responses"""
     try:
-        result = post_cart_service.get_rfq_status(rfq_id)
-        return JSONResponse(result)
+        result = post_cart_service.get_rfq_status_json(rfq_id)
+        return Response(content=result, media_type="application/json")
     except Exception as e:
         logger.error(f"Error getting RFQ status: {e}", exc_info=True)
         return JSONResponse({"error": f"Error getting RFQ status: {str(e)}"}, status_code=500)
@@ -0,0 +1,102 @@
+"""
+Persistent LLM response cache for KPA One-Flow services.
+SQLite-backed, keyed by a SHA-256 hash of prompt version, model and payload, with per-entry TTL.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache.sqlite3"),
+)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "true").lower() == "true"
+DEFAULT_TTL = 604800  # one week
+
+logger = logging.getLogger(__name__)
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "hash TEXT PRIMARY KEY, prompt_version TEXT, response BLOB, expires_at INTEGER)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS by_expiry ON llm_cache (expires_at)")
+        _conn.commit()
+    return _conn
+
+
+def make_key(prompt_version: str, model: str, *parts: Any) -> str:
+    """Build a cache key from the prompt version, model and request payload parts."""
+    raw = "|".join([prompt_version, model, *(str(p) for p in parts)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached response for key, or None if missing or expired."""
+    if not LLM_CACHE_ENABLED:
+        return None
+    try:
+        with _lock:
+            conn = _get_conn()
+            row = conn.execute("SELECT response, expires_at FROM llm_cache WHERE hash = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                conn.execute("DELETE FROM llm_cache WHERE hash = ?", (key,))
+                conn.commit()
+                return None
+        return orjson.loads(row[0]) if ORJSON_AVAILABLE else json.loads(row[0])
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning(f"LLM cache read failed: {e}")
+        return None
+
+
+def put(key: str, value: Dict[str, Any], ttl: int = DEFAULT_TTL, prompt_version: str = "") -> None:
+    """Store a response under key for ttl seconds."""
+    if not LLM_CACHE_ENABLED:
+        return
+    blob = orjson.dumps(value) if ORJSON_AVAILABLE else json.dumps(value, ensure_ascii=False).encode("utf-8")
+    try:
+        with _lock:
+            conn = _get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (hash, prompt_version, response, expires_at) VALUES (?, ?, ?, ?)",
+                (key, prompt_version, blob, int(time.time()) + ttl)
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache write failed: {e}")
+
+
+def purge_expired() -> int:
+    """Delete expired entries; returns how many were removed (0 if the cache is unavailable)."""
+    if not LLM_CACHE_ENABLED:
+        return 0
+    try:
+        with _lock:
+            conn = _get_conn()
+            cur = conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (int(time.time()),))
+            conn.commit()
+            return cur.rowcount
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache purge failed: {e}")
+        return 0
@@ -2,7 +2,7 @@
 OpenAI client configuration for KPA One-Flow services.
 """
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -18,5 +18,15 @@ def get_client():
         raise RuntimeError("OPENAI_API_KEY environment variable is required")
     return OpenAI(api_key=key)
 
-# Global client instance
+def get_async_client():
+    """Get configured AsyncOpenAI client (None without a key in testing mode)."""
+    key = os.environ.get("OPENAI_API_KEY")
+    if not key:
+        if os.environ.get("TESTING_MODE") == "true":
+            return None
+        raise RuntimeError("OPENAI_API_KEY environment variable is required")
+    return AsyncOpenAI(api_key=key)
+
+# Global client instances
 client = get_client()
+async_client = get_async_client()
@@ -7,7 +7,7 @@ import json
 import logging
 from typing import Dict, Any
 from services.openai_client import client
-from services.schema_definitions import INTAKE_SCHEMA
+from services.schema_definitions import INTAKE_RESPONSE_FORMAT
 from services.prompt_templates import SYSTEM_PROMPT, intake_prompt
 
 logger = logging.getLogger(__name__)
@@ -47,14 +47,7 @@ def run_intake(product_name: str, budget: float, quantity: int, scope_text: str)
             model="gpt-4o-mini",
             temperature=0,
             max_tokens=1000,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": INTAKE_SCHEMA["name"],
-                    "schema": INTAKE_SCHEMA["schema"],
-                    "strict": INTAKE_SCHEMA["strict"]
-                }
-            },
+            response_format=INTAKE_RESPONSE_FORMAT,
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": input_text}
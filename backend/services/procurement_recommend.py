@@ -3,17 +3,70 @@ Procurement recommendations service for KPA One-Flow.
 Generates final product recommendations based on confirmed requirements.
 """
 
+import asyncio
 import json
-import re
+import os
+import time
 import logging
-from typing import Dict, Any
-from services.openai_client import client
-from services.schema_definitions import SEARCH_READY_RECS_SCHEMA
-from services.prompt_templates import SYSTEM_PROMPT, recs_prompt
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from openai import RateLimitError
+from pydantic import ValidationError
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+from services.openai_client import client, async_client
+from services import llm_cache
+from services.schema_definitions import SEARCH_READY_RECS_RESPONSE_FORMAT, SearchReadyRecs, recommendation_id
+from services.prompt_templates import PROMPT_VERSION, SYSTEM_PROMPT, recs_prompt, recs_draft_prompt, recs_format_prompt
 
 logger = logging.getLogger(__name__)
 
-def run_recommendations(product_name: str, budget: float, quantity: int, summary: str) -> Dict[str, Any]:
+RECS_MODEL = "gpt-4o-mini"
+
+# Two-stage mode: an unconstrained draft (RECS_DRAFT_MODEL) is converted to
+# schema JSON by a cheap formatter call (RECS_MODEL), validated locally and
+# only the formatter step is retried on validation errors
+RECS_TWO_STAGE = os.getenv("RECS_TWO_STAGE", "false").lower() == "true"
+RECS_DRAFT_MODEL = os.getenv("RECS_DRAFT_MODEL", "gpt-4o")
+RECS_FORMAT_RETRIES = 2
+
+# Max concurrent recommendation calls from the async path (keeps fan-out inside RPM/TPM limits)
+RECS_CONCURRENCY = int(os.getenv("RECS_CONCURRENCY", "8"))
+# Waits between retries when OpenAI returns 429
+RATE_LIMIT_BACKOFF = (1.0, 2.0, 4.0)
+
+# Batch API polling: first wait, growth factor and ceiling (seconds)
+BATCH_POLL_INITIAL = 5.0
+BATCH_POLL_FACTOR = 2.0
+BATCH_POLL_MAX = 300.0
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _json_loads(data: Any) -> Any:
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj) if ORJSON_AVAILABLE else json.dumps(obj).encode("utf-8")
+
+
+def _ensure_id(rec: Dict[str, Any], i: int) -> None:
+    if not rec.get("id"):
+        rec["id"] = recommendation_id(rec.get("name"), i)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(RECS_CONCURRENCY)
+    return _semaphore
+
+
+def run_recommendations(product_name: str, budget: float, quantity: int, summary: str, use_cache: bool = True) -> Dict[str, Any]:
     """
     Generate product recommendations based on confirmed requirements.
     
@@ -22,151 +75,478 @@ def run_recommendations(product_name: str, budget: float, quantity: int, summary
         budget: Budget in USD
         quantity: Quantity needed
         summary: Confirmed requirements summary
+        use_cache: Serve a cached result if present; False forces a fresh
+            LLM call whose result replaces the cached entry
         
     Returns:
         Dict with recommendations and metadata
     """
     try:
-        logger.info(f"run_recommendations called with: product_name={product_name}, budget={budget}, quantity={quantity}")
-        logger.info(f"Summary length: {len(summary)} characters")
-        logger.info(f"Summary preview: {summary[:200]}...")
+        logger.info("run_recommendations called with: product_name=%s, budget=%s, quantity=%s", product_name, budget, quantity)
+        logger.info("Summary length: %s characters", len(summary))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Summary preview: %s...", summary[:200])
         
         # Check if client is available (for testing)
-        logger.info(f"Client available: {client is not None}")
+        logger.info("Client available: %s", client is not None)
         if client is None:
             logger.info("OpenAI client not available, using fallback recommendations")
-            unit_price = budget / quantity if quantity > 0 else budget
-            return {
-                "schema_version": "1.0",
-                "summary": f"Recommendations for {product_name} based on your requirements",
-                "recommendations": [
-                    {
-                        "id": "budget-option-1",
-                        "name": f"Standard {product_name}",
-                        "specs": ["Basic specifications", "Standard performance", "Essential features"],
-                        "estimated_price_usd": unit_price * 0.8,
-                        "meets_budget": True,
-                        "value_note": "Good value for money, meets basic requirements",
-                        "rationale": "Fits within budget while providing essential functionality",
-                        "score": 85.0,
-                        "vendor_search": {
-                            "model_name": f"Standard {product_name}",
-                            "spec_fragments": ["standard", "basic", "essential"],
-                            "region_hint": "USA",
-                            "budget_hint_usd": unit_price * 0.8,
-                            "query_seed": f"standard {product_name} budget"
-                        }
-                    },
-                    {
-                        "id": "premium-option-1",
-                        "name": f"Premium {product_name}",
-                        "specs": ["High-end specifications", "Premium performance", "Advanced features"],
-                        "estimated_price_usd": unit_price * 1.2,
-                        "meets_budget": False,
-                        "value_note": "Premium option with advanced features",
-                        "rationale": "Higher performance and features, slightly over budget",
-                        "score": 75.0,
-                        "vendor_search": {
-                            "model_name": f"Premium {product_name}",
-                            "spec_fragments": ["premium", "high-end", "advanced"],
-                            "region_hint": "USA",
-                            "budget_hint_usd": unit_price * 1.2,
-                            "query_seed": f"premium {product_name} high-end"
-                        }
-                    }
-                ],
-                "recommended_index": 0,
-                "selection_mode": "single_or_multi",
-                "disclaimer": "These are fallback recommendations for testing purposes."
-            }
+            return _testing_recommendations(product_name, budget, quantity)
+        
+        logger.info("Generating recommendations with summary length: %s", len(summary))
         
-        logger.info(f"Generating recommendations with summary length: {len(summary)}")
-        logger.info(f"Summary preview: {summary[:200]}...")
+        cache_key = _cache_key(product_name, budget, quantity, summary, RECS_TWO_STAGE)
+        cached = llm_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            logger.info("Recommendations served from cache")
+            return cached
         
-        payload = recs_prompt(product_name, budget, quantity, summary)
+        if RECS_TWO_STAGE:
+            draft = client.chat.completions.create(**_draft_kwargs(product_name, budget, quantity, summary))
+            content = None
+            for attempt in range(RECS_FORMAT_RETRIES + 1):
+                resp = client.chat.completions.create(**_format_kwargs(draft.choices[0].message.content))
+                content = _validated_content(resp.choices[0].message.content, attempt)
+                if content is not None:
+                    break
+        else:
+            resp = client.chat.completions.create(**_request_kwargs(product_name, budget, quantity, summary))
+            content = resp.choices[0].message.content
+        parsed = _finalize_recommendations(content)
+        llm_cache.put(cache_key, parsed, prompt_version=PROMPT_VERSION)
+        return parsed
         
-        # Use OpenAI responses API with structured output
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0,
-            max_tokens=2000,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": SEARCH_READY_RECS_SCHEMA["name"],
-                    "schema": SEARCH_READY_RECS_SCHEMA["schema"],
-                    "strict": SEARCH_READY_RECS_SCHEMA["strict"]
+    except Exception as e:
+        logger.error("Error in run_recommendations: %s", e)
+        # Return fallback response
+        return _error_recommendations(product_name, budget, quantity)
+
+
+def _testing_recommendations(product_name: str, budget: float, quantity: int) -> Dict[str, Any]:
+    """Canned recommendations used when no OpenAI client is configured."""
+    unit_price = budget / quantity if quantity > 0 else budget
+    return {
+        "schema_version": "1.0",
+        "summary": f"Recommendations for {product_name} based on your requirements",
+        "recommendations": [
+            {
+                "id": "budget-option-1",
+                "name": f"Standard {product_name}",
+                "specs": ["Basic specifications", "Standard performance", "Essential features"],
+                "estimated_price_usd": unit_price * 0.8,
+                "meets_budget": True,
+                "value_note": "Good value for money, meets basic requirements",
+                "rationale": "Fits within budget while providing essential functionality",
+                "score": 85.0,
+                "vendor_search": {
+                    "model_name": f"Standard {product_name}",
+                    "spec_fragments": ["standard", "basic", "essential"],
+                    "region_hint": "USA",
+                    "budget_hint_usd": unit_price * 0.8,
+                    "query_seed": f"standard {product_name} budget"
                 }
             },
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": payload}
-            ]
-        )
+            {
+                "id": "premium-option-1",
+                "name": f"Premium {product_name}",
+                "specs": ["High-end specifications", "Premium performance", "Advanced features"],
+                "estimated_price_usd": unit_price * 1.2,
+                "meets_budget": False,
+                "value_note": "Premium option with advanced features",
+                "rationale": "Higher performance and features, slightly over budget",
+                "score": 75.0,
+                "vendor_search": {
+                    "model_name": f"Premium {product_name}",
+                    "spec_fragments": ["premium", "high-end", "advanced"],
+                    "region_hint": "USA",
+                    "budget_hint_usd": unit_price * 1.2,
+                    "query_seed": f"premium {product_name} high-end"
+                }
+            }
+        ],
+        "recommended_index": 0,
+        "selection_mode": "single_or_multi",
+        "disclaimer": "These are fallback recommendations for testing purposes."
+    }
+
+
+def _error_recommendations(product_name: str, budget: float, quantity: int) -> Dict[str, Any]:
+    """Single low-signal recommendation returned when generation fails."""
+    return {
+        "schema_version": "1.0",
+        "summary": f"Basic recommendations for {product_name}",
+        "recommendations": [
+            {
+                "id": "fallback-1",
+                "name": f"Standard {product_name}",
+                "specs": ["Basic specifications"],
+                "estimated_price_usd": budget / quantity if quantity > 0 else budget,
+                "meets_budget": True,
+                "value_note": "Fallback recommendation",
+                "rationale": "Basic option due to processing error",
+                "score": 50.0,
+                "vendor_search": {
+                    "model_name": product_name,
+                    "spec_fragments": [product_name],
+                    "region_hint": "USA",
+                    "budget_hint_usd": budget,
+                    "query_seed": product_name
+                }
+            }
+        ],
+        "recommended_index": 0,
+        "selection_mode": "single_or_multi",
+        "disclaimer": "Fallback recommendation due to processing error."
+    }
+
+
+def _request_kwargs(product_name: str, budget: float, quantity: int, summary: str) -> Dict[str, Any]:
+    """Chat Completions arguments shared by the sync and async paths."""
+    payload = recs_prompt(product_name, budget, quantity, summary)
+    
+    # Use OpenAI responses API with structured output
+    return dict(
+        model=RECS_MODEL,
+        temperature=0,
+        max_tokens=2000,
+        response_format=SEARCH_READY_RECS_RESPONSE_FORMAT,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": payload}
+        ]
+    )
+
+
+def _draft_kwargs(product_name: str, budget: float, quantity: int, summary: str) -> Dict[str, Any]:
+    """Stage 1 of two-stage mode: free-form reasoning and draft, no schema constraint."""
+    return dict(
+        model=RECS_DRAFT_MODEL,
+        temperature=0,
+        max_tokens=2000,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": recs_draft_prompt(product_name, budget, quantity, summary)}
+        ]
+    )
+
+
+def _format_kwargs(draft: str) -> Dict[str, Any]:
+    """Stage 2 of two-stage mode: coerce the draft into SEARCH_READY_RECS JSON."""
+    return dict(
+        model=RECS_MODEL,
+        temperature=0,
+        max_tokens=2000,
+        response_format=SEARCH_READY_RECS_RESPONSE_FORMAT,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": recs_format_prompt(draft or "")}
+        ]
+    )
+
+
+def _validated_content(content: Optional[str], attempt: int) -> Optional[str]:
+    """Return content if it validates against SearchReadyRecs, else None (or raise on the last attempt)."""
+    try:
+        SearchReadyRecs.model_validate_json(content or "")
+        return content
+    except ValidationError as e:
+        if attempt >= RECS_FORMAT_RETRIES:
+            raise ValueError(f"Formatter output failed validation: {e}")
+        logger.warning("Formatter output failed validation (attempt %s), retrying: %s errors", attempt + 1, e.error_count())
+        return None
+
+
+def _cache_key(product_name: str, budget: float, quantity: int, summary: str, two_stage: bool) -> str:
+    model = f"{RECS_DRAFT_MODEL}>{RECS_MODEL}" if two_stage else RECS_MODEL
+    return llm_cache.make_key(PROMPT_VERSION, model, product_name, budget, quantity, summary)
+
+
+def _finalize_recommendations(content: Optional[str]) -> Dict[str, Any]:
+    """Parse the model output and fill in IDs and defaults."""
+    if not content:
+        raise ValueError("Empty response from OpenAI")
+    
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("OpenAI response content: %s...", content[:500])
+    
+    # Parses, validates, fills missing IDs/defaults and clamps recommended_index
+    try:
+        recs = SearchReadyRecs.model_validate_json(content)
+    except ValidationError as e:
+        logger.error("Invalid recommendations response: %s", e)
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("Content: %s", content[:500])
+        raise ValueError(f"Invalid JSON response: {e}")
+    
+    if logger.isEnabledFor(logging.INFO):
+        for i, rec in enumerate(recs.recommendations):
+            logger.info("Rec %d: %s - $%s", i + 1, rec.name, rec.estimated_price_usd)
+    
+    logger.info("Recommendations generated: %s options", len(recs.recommendations))
+    return recs.model_dump()
+
+
+async def _acreate(**kwargs) -> Any:
+    """async_client chat completion, retried after 1s/2s/4s on 429."""
+    for delay in (*RATE_LIMIT_BACKOFF, None):
+        try:
+            return await async_client.chat.completions.create(**kwargs)
+        except RateLimitError:
+            if delay is None:
+                raise
+            logger.warning("Rate limited generating recommendations, retrying in %.0fs", delay)
+            await asyncio.sleep(delay)
+
+
+async def run_recommendations_async(product_name: str, budget: float, quantity: int, summary: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Async run_recommendations on the shared AsyncOpenAI client.
+    
+    At most RECS_CONCURRENCY calls are in flight at once; 429 responses are
+    retried after 1s/2s/4s before falling back. use_cache=False skips the
+    cache lookup and refreshes the stored entry.
+    """
+    try:
+        logger.info("run_recommendations_async called with: product_name=%s, budget=%s, quantity=%s", product_name, budget, quantity)
+        if async_client is None:
+            logger.info("OpenAI client not available, using fallback recommendations")
+            return _testing_recommendations(product_name, budget, quantity)
         
-        # Parse response
-        content = resp.choices[0].message.content
-        if not content:
-            raise ValueError("Empty response from OpenAI")
-            
-        logger.info(f"OpenAI response content: {content[:500]}...")
+        cache_key = _cache_key(product_name, budget, quantity, summary, RECS_TWO_STAGE)
+        cached = llm_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            logger.info("Recommendations served from cache")
+            return cached
         
-        try:
-            parsed = json.loads(content)
-            logger.info(f"Parsed recommendations: {len(parsed.get('recommendations', []))} options")
-            for i, rec in enumerate(parsed.get('recommendations', [])):
-                logger.info(f"Rec {i+1}: {rec.get('name')} - ${rec.get('estimated_price_usd')}")
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error in recommendations: {e}")
-            logger.error(f"Content: {content[:500]}")
-            raise ValueError(f"Invalid JSON response: {e}")
+        async with _get_semaphore():
+            if RECS_TWO_STAGE:
+                draft = await _acreate(**_draft_kwargs(product_name, budget, quantity, summary))
+                content = None
+                for attempt in range(RECS_FORMAT_RETRIES + 1):
+                    resp = await _acreate(**_format_kwargs(draft.choices[0].message.content))
+                    content = _validated_content(resp.choices[0].message.content, attempt)
+                    if content is not None:
+                        break
+            else:
+                resp = await _acreate(**_request_kwargs(product_name, budget, quantity, summary))
+                content = resp.choices[0].message.content
+        parsed = _finalize_recommendations(content)
+        llm_cache.put(cache_key, parsed, prompt_version=PROMPT_VERSION)
+        return parsed
         
-        # Ensure IDs and defaults
-        recommendations = parsed.get("recommendations", [])
-        for i, rec in enumerate(recommendations):
-            if not rec.get("id"):
-                # Generate ID from name
-                base = re.sub(r"[^a-z0-9]+", "-", (rec.get("name") or f"rec-{i+1}").lower()).strip("-")
-                rec["id"] = f"{base}-{i+1}"
+    except Exception as e:
+        logger.error("Error in run_recommendations_async: %s", e)
+        return _error_recommendations(product_name, budget, quantity)
+
+
+async def run_recommendations_many(requests: List[Tuple[str, float, int, str]]) -> List[Dict[str, Any]]:
+    """
+    Generate recommendations for several products concurrently.
+    
+    Args:
+        requests: (product_name, budget, quantity, summary) tuples
         
-        # Set defaults
-        parsed.setdefault("schema_version", "1.0")
-        parsed.setdefault("selection_mode", "single_or_multi")
-        parsed.setdefault("disclaimer", "Recommendations are AI-generated and should be verified before procurement.")
+    Returns:
+        Recommendation packs in the same order as requests
+    """
+    return list(await asyncio.gather(*(run_recommendations_async(*r) for r in requests)))
+
+
+# Batch API path for offline bulk runs (e.g. nightly re-scoring): half the
+# cost of the interactive endpoint and much higher aggregate throughput.
+
+def submit_recs_batch(items: List[Tuple[str, float, int, str]]) -> str:
+    """
+    Submit recommendation requests to the OpenAI Batch API.
+    
+    Args:
+        items: (product_name, budget, quantity, summary) tuples
         
-        # Ensure recommended_index is valid
-        if "recommended_index" not in parsed or parsed["recommended_index"] >= len(recommendations):
-            parsed["recommended_index"] = 0
-            
-        logger.info(f"Recommendations generated: {len(recommendations)} options")
-        return parsed
+    Returns:
+        Batch ID to pass to poll_batch / fetch_recs_batch_results
+    """
+    if client is None:
+        raise RuntimeError("OpenAI client not available for batch submission")
+    
+    jsonl = b"\n".join(
+        _json_dumps({
+            "custom_id": f"recs-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _request_kwargs(*item),
+        })
+        for i, item in enumerate(items)
+    )
+    batch_file = client.files.create(
+        file=("recs_batch.jsonl", jsonl),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info("Submitted recommendations batch %s with %s requests", batch.id, len(items))
+    return batch.id
+
+
+def poll_batch(batch_id: str, timeout: Optional[float] = None) -> Any:
+    """
+    Wait for a batch to reach a terminal status, backing off exponentially.
+    
+    Returns:
+        The final batch object (check .status)
+    
+    Raises:
+        TimeoutError: if timeout seconds pass first
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    delay = BATCH_POLL_INITIAL
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            logger.info("Batch %s finished with status %s", batch_id, batch.status)
+            return batch
+        if deadline is not None and time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.status} after {timeout}s")
+        logger.info("Batch %s is %s, checking again in %.0fs", batch_id, batch.status, delay)
+        time.sleep(delay)
+        delay = min(delay * BATCH_POLL_FACTOR, BATCH_POLL_MAX)
+
+
+def fetch_recs_batch_results(batch: Any, items: List[Tuple[str, float, int, str]]) -> List[Dict[str, Any]]:
+    """
+    Download and parse a finished batch's output.
+    
+    Returns:
+        Recommendation packs in the order of items; requests that failed or
+        are missing from the output get the usual fallback pack
+    """
+    contents: Dict[str, Optional[str]] = {}
+    if getattr(batch, "output_file_id", None):
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            row = _json_loads(line)
+            response = row.get("response") or {}
+            if response.get("status_code") == 200:
+                contents[row["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    
+    results = []
+    for i, item in enumerate(items):
+        try:
+            content = contents.get(f"recs-{i}")
+            if content is None:
+                raise ValueError("No successful response in batch output")
+            results.append(_finalize_recommendations(content))
+        except Exception as e:
+            logger.error("Error in batch recommendations for %s: %s", item[0], e)
+            results.append(_error_recommendations(item[0], item[1], item[2]))
+    return results
+
+
+def run_recommendations_batch(items: List[Tuple[str, float, int, str]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Submit, wait for and parse a recommendations batch (for non-interactive jobs)."""
+    batch = poll_batch(submit_recs_batch(items), timeout=timeout)
+    return fetch_recs_batch_results(batch, items)
+
+
+class _RecommendationStreamParser:
+    """
+    Incremental scanner over streamed SEARCH_READY_RECS JSON text.
+    
+    feed() returns each element of the top-level "recommendations" array as
+    soon as its closing brace arrives; everything else is only buffered.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key = None
+        self._in_recs = False
+        self._obj_start = -1
+    
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        self.text += delta
+        done = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start:i]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_key == "recommendations":
+                    self._in_recs = True
+                elif ch == "{" and self._in_recs and self._depth == 2:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._in_recs and self._depth == 2 and self._obj_start >= 0:
+                    done.append(_json_loads(text[self._obj_start:i + 1]))
+                    self._obj_start = -1
+                elif ch == "]" and self._in_recs and self._depth == 1:
+                    self._in_recs = False
+        self._pos = len(text)
+        return done
+
+
+async def stream_recommendations(product_name: str, budget: float, quantity: int, summary: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream recommendations as the model produces them.
+    
+    Yields {"type": "recommendation", "index": i, "recommendation": {...}}
+    for each option as soon as it is complete, then one
+    {"type": "complete", "recommendations": pack} with the same finalized
+    pack run_recommendations would return (fallbacks included).
+    """
+    try:
+        if async_client is None:
+            logger.info("OpenAI client not available, using fallback recommendations")
+            yield {"type": "complete", "recommendations": _testing_recommendations(product_name, budget, quantity)}
+            return
+        
+        cache_key = _cache_key(product_name, budget, quantity, summary, False)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Recommendations served from cache")
+            yield {"type": "complete", "recommendations": cached}
+            return
+        
+        parser = _RecommendationStreamParser()
+        emitted = 0
+        async with _get_semaphore():
+            stream = await async_client.chat.completions.create(
+                stream=True, **_request_kwargs(product_name, budget, quantity, summary)
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                for rec in parser.feed(delta):
+                    _ensure_id(rec, emitted)
+                    yield {"type": "recommendation", "index": emitted, "recommendation": rec}
+                    emitted += 1
+        parsed = _finalize_recommendations(parser.text)
+        llm_cache.put(cache_key, parsed, prompt_version=PROMPT_VERSION)
+        yield {"type": "complete", "recommendations": parsed}
         
     except Exception as e:
-        logger.error(f"Error in run_recommendations: {e}")
-        # Return fallback response
-        return {
-            "schema_version": "1.0",
-            "summary": f"Basic recommendations for {product_name}",
-            "recommendations": [
-                {
-                    "id": "fallback-1",
-                    "name": f"Standard {product_name}",
-                    "specs": ["Basic specifications"],
-                    "estimated_price_usd": budget / quantity if quantity > 0 else budget,
-                    "meets_budget": True,
-                    "value_note": "Fallback recommendation",
-                    "rationale": "Basic option due to processing error",
-                    "score": 50.0,
-                    "vendor_search": {
-                        "model_name": product_name,
-                        "spec_fragments": [product_name],
-                        "region_hint": "USA",
-                        "budget_hint_usd": budget,
-                        "query_seed": product_name
-                    }
-                }
-            ],
-            "recommended_index": 0,
-            "selection_mode": "single_or_multi",
-            "disclaimer": "Fallback recommendation due to processing error."
-        }
+        logger.error("Error in stream_recommendations: %s", e)
+        yield {"type": "complete", "recommendations": _error_recommendations(product_name, budget, quantity)}
@@ -0,0 +1,26 @@
+"""
+Prompt compaction helpers for KPA One-Flow.
+Shrinks requirement lists before they are formatted into LLM prompts.
+"""
+
+from typing import Iterable, List
+
+# Answers that are placeholders rather than requirements
+EMPTY_ANSWERS = frozenset({"na", "n/a", "no", "none", "tbd", "-", "not sure", "n.a."})
+
+
+def compact_specs(specs: Iterable[str]) -> List[str]:
+    """
+    Drop placeholder and duplicate entries from a list of spec strings.
+
+    Entries keep their original wording (only surrounding whitespace is
+    stripped); duplicates are detected case- and whitespace-insensitively
+    and the first occurrence wins.
+    """
+    compacted = {}
+    for spec in specs:
+        text = spec.strip() if spec else ""
+        key = " ".join(text.lower().split())
+        if key and key not in EMPTY_ANSWERS and key not in compacted:
+            compacted[key] = text
+    return list(compacted.values())
@@ -2,6 +2,17 @@
 Prompt templates for KPA One-Flow AI interactions.
 """
 
+import os
+
+from utils.token_utils import truncate_to_tokens
+
+# Bump when SYSTEM_PROMPT, a prompt template or a response schema changes so
+# cached LLM responses built from the old prompts are no longer used
+PROMPT_VERSION = "1"
+
+# Token cap for the confirmed requirements summary in recommendation prompts
+RECS_SUMMARY_MAX_TOKENS = int(os.getenv("RECS_SUMMARY_MAX_TOKENS", "6000"))
+
 SYSTEM_PROMPT = """
 You are the Knowmadics Procurement AI Assistant (KPA).
 - For INTAKE: ask 3–6 targeted, non-redundant follow-ups; stop when confident.
@@ -25,6 +36,7 @@ Return JSON per INTAKE schema."""
 
 def recs_prompt(product_name: str, budget: float, quantity: int, confirmed_summary: str) -> str:
     """Generate prompt for recommendations phase."""
+    confirmed_summary = truncate_to_tokens(confirmed_summary, RECS_SUMMARY_MAX_TOKENS)
     return f"""CONFIRMED_REQUIREMENTS_SUMMARY:
 {confirmed_summary}
 
@@ -35,3 +47,26 @@ QUANTITY: {quantity}
 TASK: Produce 1–5 recommendations ordered by overall fit. 
 Include score (0..100), budget fit, vendor_search fields. 
 Return JSON per SEARCH_READY_RECS schema. No links."""
+
+def recs_draft_prompt(product_name: str, budget: float, quantity: int, confirmed_summary: str) -> str:
+    """Generate prompt for the free-form drafting stage of two-stage recommendations."""
+    confirmed_summary = truncate_to_tokens(confirmed_summary, RECS_SUMMARY_MAX_TOKENS)
+    return f"""CONFIRMED_REQUIREMENTS_SUMMARY:
+{confirmed_summary}
+
+PRODUCT_NAME: {product_name}
+BUDGET_USD: {budget}
+QUANTITY: {quantity}
+
+TASK: Reason briefly about the requirements, then draft 1–5 recommendations ordered by overall fit.
+For each: name, key specs, estimated unit price (USD), whether it meets budget, value note,
+rationale, score (0..100), and vendor search hints (model name, up to 3 spec fragments,
+region, budget hint, query seed). Plain text, no JSON. No links."""
+
+def recs_format_prompt(draft: str) -> str:
+    """Generate prompt that converts a recommendations draft to schema JSON."""
+    return f"""DRAFT_RECOMMENDATIONS:
+{draft}
+
+TASK: Convert the draft into JSON per SEARCH_READY_RECS schema. Keep its options, order,
+prices and scores; do not invent new options. Set recommended_index to the best fit."""
@@ -2,6 +2,11 @@
 JSON schema definitions for KPA One-Flow API responses.
 """
 
+import re
+from functools import lru_cache
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
 INTAKE_SCHEMA = {
     "name": "ProcurementIntake",
     "schema": {
@@ -108,3 +113,106 @@ SEARCH_READY_RECS_SCHEMA = {
     },
     "strict": True
 }
+
+
+def _response_format(schema: dict) -> dict:
+    """Chat Completions response_format for a named schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema["name"],
+            "schema": schema["schema"],
+            "strict": schema["strict"]
+        }
+    }
+
+
+# Prebuilt once at import and shared by every request (and Batch JSONL row)
+INTAKE_RESPONSE_FORMAT = _response_format(INTAKE_SCHEMA)
+SEARCH_READY_RECS_RESPONSE_FORMAT = _response_format(SEARCH_READY_RECS_SCHEMA)
+
+
+# Pydantic mirrors of SEARCH_READY_RECS_SCHEMA, for validating model output locally.
+# Validation also fills in missing IDs and top-level defaults.
+
+DEFAULT_DISCLAIMER = "Recommendations are AI-generated and should be verified before procurement."
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=256)
+def slugify(name: str) -> str:
+    """Lowercase name with each run of non [a-z0-9] characters turned into '-'."""
+    return _SLUG_RE.sub("-", name.lower()).strip("-")
+
+
+def recommendation_id(name: Optional[str], i: int) -> str:
+    """ID for the i-th (0-based) recommendation, from its name."""
+    return f"{slugify(name or f'rec-{i+1}')}-{i+1}"
+
+class VendorSearch(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    model_name: str
+    spec_fragments: List[str] = Field(min_length=1, max_length=3)
+    region_hint: Optional[str]
+    budget_hint_usd: Optional[float]
+    query_seed: str
+    
+    @field_validator("spec_fragments", mode="before")
+    @classmethod
+    def _cap_spec_fragments(cls, v):
+        # Strict mode does not reliably enforce maxItems; keep the first 3
+        return v[:3] if isinstance(v, list) else v
+
+
+class Recommendation(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    id: str = ""
+    name: str
+    specs: List[str] = Field(min_length=1)
+    estimated_price_usd: Optional[float]
+    meets_budget: bool
+    value_note: str
+    rationale: str
+    score: float = Field(ge=0, le=100)
+    vendor_search: VendorSearch
+    
+    @field_validator("id", mode="before")
+    @classmethod
+    def _blank_id(cls, v):
+        # null or whitespace IDs are regenerated by SearchReadyRecs
+        return (v or "").strip()
+    
+    @field_validator("score", mode="before")
+    @classmethod
+    def _clamp_score(cls, v):
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            return min(max(v, 0), 100)
+        return v
+
+
+class SearchReadyRecs(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    schema_version: str = "1.0"
+    summary: str
+    recommendations: List[Recommendation] = Field(min_length=1, max_length=5)
+    recommended_index: int = 0
+    selection_mode: str = "single_or_multi"
+    disclaimer: str = DEFAULT_DISCLAIMER
+    
+    @field_validator("recommendations", mode="before")
+    @classmethod
+    def _cap_recommendations(cls, v):
+        return v[:5] if isinstance(v, list) else v
+    
+    @model_validator(mode="after")
+    def _fill_ids_and_index(self):
+        for i, rec in enumerate(self.recommendations):
+            if not rec.id:
+                rec.id = recommendation_id(rec.name, i)
+        if not 0 <= self.recommended_index < len(self.recommendations):
+            self.recommended_index = 0
+        return self
@@ -5,17 +5,58 @@ Uses OpenAI o4-mini with web_search tool to find vendors
 """
 
 import os
-from openai import OpenAI
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from openai import DefaultHttpxClient, OpenAI
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bounded, thread-safe memo of recent searches: repeated identical queries
+# (re-renders, retries) skip a 60-120s web search. Short TTL since results are live.
+SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "256"))
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("WEB_SEARCH_CACHE_TTL", "900"))
+_search_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> OpenAI:
+    """Return a shared OpenAI client per API key so TCP/TLS connections are reused."""
+    # DefaultHttpxClient keeps the SDK's timeouts (web searches take minutes) and pool limits
+    return OpenAI(api_key=api_key, http_client=DefaultHttpxClient(http2=HTTP2_AVAILABLE))
+
+
+def _search_key(query: str) -> str:
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+
 
 def run_web_search(query: str) -> str:
     """Run web search using the exact code pattern provided."""
+    key = _search_key(query)
+    now = time.monotonic()
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is not None and now - entry[0] < SEARCH_CACHE_TTL_SECONDS:
+            _search_cache.move_to_end(key)
+            return entry[1]
+
     try:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
-            print("❌ OPENAI_API_KEY not set")
+            logger.error("OPENAI_API_KEY not set")
             return ""
 
-        client = OpenAI(api_key=api_key)
+        client = _get_client(api_key)
 
         resp = client.responses.create(
             model="o4-mini",                     # reasoning-capable model
@@ -25,8 +66,16 @@ def run_web_search(query: str) -> str:
             tool_choice="auto"
         )
 
-        return resp.output_text or ""
+        output = resp.output_text or ""
     except Exception as e:
-        print(f"❌ Web search error: {e}")
+        logger.error("Web search error: %s", e)
         return ""
-        
\ No newline at end of file
+
+    # Only cache real results; empty output is retried next time
+    if output:
+        with _search_cache_lock:
+            _search_cache[key] = (now, output)
+            _search_cache.move_to_end(key)
+            while len(_search_cache) > SEARCH_CACHE_SIZE:
+                _search_cache.popitem(last=False)
+    return output
@@ -0,0 +1,48 @@
+"""
+Token budgeting utilities for LLM prompts.
+Truncates text by model tokens (tiktoken) rather than characters.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Rough characters-per-token ratio used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    """Return the tokenizer for a model, or None if it cannot be loaded."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # e.g. BPE files cannot be fetched offline
+        return None
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """
+    Truncate text to at most max_tokens tokens for the given model.
+
+    Falls back to max_tokens * CHARS_PER_TOKEN characters without tiktoken.
+    """
+    # Every token covers at least one character, so short texts always fit
+    if len(text) <= max_tokens:
+        return text
+    enc = _get_encoding(model)
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
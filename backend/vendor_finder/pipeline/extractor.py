@@ -5,10 +5,37 @@ Fetches URL and parses product fields from HTML.
 """
 
 from typing import Dict, List, Optional
+from collections import namedtuple
 from datetime import datetime, timezone
 import re
 import requests
 
+from .keywords import BACKORDER_PHRASES, IN_STOCK_PHRASES, OUT_OF_STOCK_PHRASES
+
+VendorProfile = namedtuple(
+    "VendorProfile", "domain price_factor delivery_days sales_email sales_phone address"
+)
+
+# Known vendors used for URL attribution and mock data, built once at import
+VENDOR_PROFILES: Dict[str, VendorProfile] = {
+    "CDW": VendorProfile("cdw.com", 1.0, 5, "sales@cdw.com", "(800) 800-4239", "200 N Milwaukee Ave, Vernon Hills, IL 60061"),
+    "B&H Photo Video": VendorProfile("bhphotovideo.com", 0.95, 3, "sales@bhphotovideo.com", "(800) 606-6969", "420 9th Ave, New York, NY 10001"),
+    "Newegg": VendorProfile("newegg.com", 1.05, 7, "webform", "(800) 390-1119", "17560 Rowland St, City of Industry, CA 91748"),
+    "Micro Center": VendorProfile("microcenter.com", 0.98, 4, "sales@microcenter.com", "(800) 634-3478", "6111 Peachtree Dunwoody Rd, Atlanta, GA 30328"),
+    "Insight": VendorProfile("insight.com", 1.02, 6, "sales@insight.com", "(800) 446-4478", "6820 S Harl Ave, Tempe, AZ 85283"),
+    "Amazon": VendorProfile("amazon.com", 0.97, 2, "webform", "(888) 280-4331", "410 Terry Ave N, Seattle, WA 98109"),
+    "Best Buy": VendorProfile("bestbuy.com", 1.03, 3, "webform", "(888) 237-8289", "7601 Penn Ave S, Richfield, MN 55423"),
+    "Adorama": VendorProfile("adorama.com", 0.96, 5, "sales@adorama.com", "(800) 223-2500", "42 W 18th St, New York, NY 10011"),
+    "Connection": VendorProfile("connection.com", 1.01, 6, "sales@connection.com", "(800) 800-5555", "100 Enterprise Dr, Rocky Hill, CT 06067"),
+    "Zones": VendorProfile("zones.com", 1.04, 7, "sales@zones.com", "(800) 248-0800", "1100 112th Ave NE, Bellevue, WA 98004"),
+    "WWT": VendorProfile("wwt.com", 1.06, 8, "sales@wwt.com", "(314) 333-1111", "1 World Wide Technology Blvd, St. Louis, MO 63134"),
+    "SHI": VendorProfile("shi.com", 1.05, 7, "sales@shi.com", "(888) 764-7467", "290 Davidson Ave, Somerset, NJ 08873"),
+    "Softcat": VendorProfile("softcat.com", 1.07, 9, "sales@softcat.com", "(800) 338-0125", "1 Waterside, Arlington Business Park, Theale, Reading RG7 4SW, UK"),
+    "Optiv": VendorProfile("optiv.com", 1.08, 10, "sales@optiv.com", "(866) 347-2884", "1144 15th St, Denver, CO 80202"),
+    "GuidePoint Security": VendorProfile("guidepointsecurity.com", 1.09, 11, "sales@guidepointsecurity.com", "(703) 234-5000", "12020 Sunrise Valley Dr, Reston, VA 20191"),
+}
+VENDOR_BY_DOMAIN: Dict[str, str] = {profile.domain: name for name, profile in VENDOR_PROFILES.items()}
+
 class Extractor:
     """Fetch URL and parse product fields. Returns a partial candidate dict."""
     
@@ -185,108 +212,28 @@ class Extractor:
 
     def _get_mock_price(self, vendor_name: str, base_price: float = 1499.99) -> float:
         """Get mock price based on vendor and product base price."""
-        price_variations = {
-            "CDW": base_price,
-            "B&H Photo Video": base_price * 0.95,
-            "Newegg": base_price * 1.05,
-            "Micro Center": base_price * 0.98,
-            "Insight": base_price * 1.02,
-            "Amazon": base_price * 0.97,
-            "Best Buy": base_price * 1.03,
-            "Adorama": base_price * 0.96,
-            "Connection": base_price * 1.01,
-            "Zones": base_price * 1.04,
-            "WWT": base_price * 1.06,
-            "SHI": base_price * 1.05,
-            "Softcat": base_price * 1.07,
-            "Optiv": base_price * 1.08,
-            "GuidePoint Security": base_price * 1.09
-        }
-        return price_variations.get(vendor_name, base_price)
+        profile = VENDOR_PROFILES.get(vendor_name)
+        return base_price * profile.price_factor if profile else base_price
 
     def _get_mock_delivery(self, vendor_name: str) -> int:
         """Get mock delivery days based on vendor."""
-        delivery_times = {
-            "CDW": 5,
-            "B&H Photo Video": 3,
-            "Newegg": 7,
-            "Micro Center": 4,
-            "Insight": 6,
-            "Amazon": 2,
-            "Best Buy": 3,
-            "Adorama": 5,
-            "Connection": 6,
-            "Zones": 7,
-            "WWT": 8,
-            "SHI": 7,
-            "Softcat": 9,
-            "Optiv": 10,
-            "GuidePoint Security": 11
-        }
-        return delivery_times.get(vendor_name, 7)
+        profile = VENDOR_PROFILES.get(vendor_name)
+        return profile.delivery_days if profile else 7
 
     def _get_mock_email(self, vendor_name: str) -> str:
         """Get mock sales email based on vendor."""
-        emails = {
-            "CDW": "sales@cdw.com",
-            "B&H Photo Video": "sales@bhphotovideo.com",
-            "Newegg": "webform",
-            "Micro Center": "sales@microcenter.com",
-            "Insight": "sales@insight.com",
-            "Amazon": "webform",
-            "Best Buy": "webform",
-            "Adorama": "sales@adorama.com",
-            "Connection": "sales@connection.com",
-            "Zones": "sales@zones.com",
-            "WWT": "sales@wwt.com",
-            "SHI": "sales@shi.com",
-            "Softcat": "sales@softcat.com",
-            "Optiv": "sales@optiv.com",
-            "GuidePoint Security": "sales@guidepointsecurity.com"
-        }
-        return emails.get(vendor_name, "webform")
+        profile = VENDOR_PROFILES.get(vendor_name)
+        return profile.sales_email if profile else "webform"
 
     def _get_mock_phone(self, vendor_name: str) -> str:
         """Get mock phone number based on vendor."""
-        phones = {
-            "CDW": "(800) 800-4239",
-            "B&H Photo Video": "(800) 606-6969",
-            "Newegg": "(800) 390-1119",
-            "Micro Center": "(800) 634-3478",
-            "Insight": "(800) 446-4478",
-            "Amazon": "(888) 280-4331",
-            "Best Buy": "(888) 237-8289",
-            "Adorama": "(800) 223-2500",
-            "Connection": "(800) 800-5555",
-            "Zones": "(800) 248-0800",
-            "WWT": "(314) 333-1111",
-            "SHI": "(888) 764-7467",
-            "Softcat": "(800) 338-0125",
-            "Optiv": "(866) 347-2884",
-            "GuidePoint Security": "(703) 234-5000"
-        }
-        return phones.get(vendor_name, "(800) 000-0000")
+        profile = VENDOR_PROFILES.get(vendor_name)
+        return profile.sales_phone if profile else "(800) 000-0000"
 
     def _get_mock_address(self, vendor_name: str) -> str:
         """Get mock business address based on vendor."""
-        addresses = {
-            "CDW": "200 N Milwaukee Ave, Vernon Hills, IL 60061",
-            "B&H Photo Video": "420 9th Ave, New York, NY 10001",
-            "Newegg": "17560 Rowland St, City of Industry, CA 91748",
-            "Micro Center": "6111 Peachtree Dunwoody Rd, Atlanta, GA 30328",
-            "Insight": "6820 S Harl Ave, Tempe, AZ 85283",
-            "Amazon": "410 Terry Ave N, Seattle, WA 98109",
-            "Best Buy": "7601 Penn Ave S, Richfield, MN 55423",
-            "Adorama": "42 W 18th St, New York, NY 10011",
-            "Connection": "100 Enterprise Dr, Rocky Hill, CT 06067",
-            "Zones": "1100 112th Ave NE, Bellevue, WA 98004",
-            "WWT": "1 World Wide Technology Blvd, St. Louis, MO 63134",
-            "SHI": "290 Davidson Ave, Somerset, NJ 08873",
-            "Softcat": "1 Waterside, Arlington Business Park, Theale, Reading RG7 4SW, UK",
-            "Optiv": "1144 15th St, Denver, CO 80202",
-            "GuidePoint Security": "12020 Sunrise Valley Dr, Reston, VA 20191"
-        }
-        return addresses.get(vendor_name, "123 Main St, Anytown, USA 12345")
+        profile = VENDOR_PROFILES.get(vendor_name)
+        return profile.address if profile else "123 Main St, Anytown, USA 12345"
 
     def _parse(self, html: str, url: str) -> Dict:
         """
@@ -389,25 +336,7 @@ class Extractor:
 
     def _extract_vendor_from_url(self, url: str) -> str:
         """Extract vendor name from URL."""
-        domain_mapping = {
-            "cdw.com": "CDW",
-            "bhphotovideo.com": "B&H Photo Video", 
-            "newegg.com": "Newegg",
-            "microcenter.com": "Micro Center",
-            "insight.com": "Insight",
-            "amazon.com": "Amazon",
-            "bestbuy.com": "Best Buy",
-            "adorama.com": "Adorama",
-            "connection.com": "Connection",
-            "zones.com": "Zones",
-            "wwt.com": "WWT",
-            "shi.com": "SHI",
-            "softcat.com": "Softcat",
-            "optiv.com": "Optiv",
-            "guidepointsecurity.com": "GuidePoint Security"
-        }
-        
-        for domain, vendor in domain_mapping.items():
+        for domain, vendor in VENDOR_BY_DOMAIN.items():
             if domain in url:
                 return vendor
         
@@ -455,11 +384,11 @@ class Extractor:
         """Extract availability status from HTML."""
         html_lower = html.lower()
         
-        if any(word in html_lower for word in ["in stock", "available", "add to cart", "buy now"]):
+        if IN_STOCK_PHRASES.search(html_lower):
             return "in_stock"
-        elif any(word in html_lower for word in ["backorder", "pre-order", "preorder"]):
+        elif BACKORDER_PHRASES.search(html_lower):
             return "backorder"
-        elif any(word in html_lower for word in ["out of stock", "unavailable", "sold out"]):
+        elif OUT_OF_STOCK_PHRASES.search(html_lower):
             return "out_of_stock"
         else:
             return "unknown"
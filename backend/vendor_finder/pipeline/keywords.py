@@ -0,0 +1,61 @@
+# pipeline/keywords.py
+"""
+Keyword matching module for vendor finder.
+Compile-once multi-substring matchers for vendor, manufacturer and stock keywords.
+"""
+
+import re
+from typing import Iterable
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordSet:
+    """
+    Fixed set of substrings matched in a single pass over the text.
+
+    Uses a pyahocorasick automaton when installed, otherwise one precompiled
+    alternation regex. Either way `keyword_set.search(text)` is equivalent to
+    `any(keyword in text for keyword in keywords)`.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            self._pattern = re.compile("|".join(re.escape(k) for k in self.keywords))
+
+    def search(self, text: str) -> bool:
+        """True if any keyword occurs as a substring of text."""
+        if not text:
+            return False
+        if AHOCORASICK_AVAILABLE:
+            return next(self._automaton.iter(text), None) is not None
+        return self._pattern.search(text) is not None
+
+
+# Known US vendors, by tier (lowercase vendor-name substrings)
+TIER1_VENDORS = KeywordSet(["cdw", "insight", "wwt", "shi", "softcat", "optiv", "guidepoint"])
+TIER2_VENDORS = KeywordSet(["bh photo", "newegg", "micro center", "amazon", "best buy", "adorama"])
+KNOWN_VENDORS = KeywordSet(TIER1_VENDORS.keywords + TIER2_VENDORS.keywords + ("connection", "zones"))
+
+# Delivery speed classes used for the Wichita ETA estimate
+FAST_VENDORS = KeywordSet(["amazon", "best buy", "newegg"])
+STANDARD_VENDORS = KeywordSet(["cdw", "bh photo", "micro center", "insight"])
+ENTERPRISE_VENDORS = KeywordSet(["wwt", "shi", "softcat", "optiv", "guidepoint"])
+
+MANUFACTURER_NOTES = KeywordSet(["manufacturer", "mfr", "direct", "official", "oem"])
+MANUFACTURER_INDICATORS = KeywordSet(MANUFACTURER_NOTES.keywords + ("factory", "headquarters", "corporate"))
+
+# Stock status phrases, checked in this order on the lowercased page
+IN_STOCK_PHRASES = KeywordSet(["in stock", "available", "add to cart", "buy now"])
+BACKORDER_PHRASES = KeywordSet(["backorder", "pre-order", "preorder"])
+OUT_OF_STOCK_PHRASES = KeywordSet(["out of stock", "unavailable", "sold out"])
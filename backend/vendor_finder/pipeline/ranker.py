@@ -6,6 +6,8 @@ Ranks vendors by stock status, price, delivery time, and manufacturer proximity.
 
 from typing import List, Dict
 
+from .keywords import KNOWN_VENDORS, MANUFACTURER_INDICATORS, MANUFACTURER_NOTES, TIER1_VENDORS, TIER2_VENDORS
+
 class Ranker:
     """Ranks vendors by multiple criteria."""
     
@@ -35,19 +37,12 @@ class Ranker:
             
             # 4. Manufacturer proximity (manufacturer = 0, others = 1)
             notes = candidate.get("notes", "").lower()
-            is_manufacturer = any(keyword in notes for keyword in [
-                "manufacturer", "mfr", "direct", "official", "oem"
-            ])
+            is_manufacturer = MANUFACTURER_NOTES.search(notes)
             mfr_priority = 0 if is_manufacturer else 1
             
             # 5. Vendor reputation (known vendors = 0, others = 1)
             vendor_name = candidate.get("vendor_name", "").lower()
-            known_vendors = [
-                "cdw", "bh photo", "newegg", "micro center", "insight",
-                "amazon", "best buy", "adorama", "connection", "zones",
-                "wwt", "shi", "softcat", "optiv", "guidepoint"
-            ]
-            reputation_priority = 0 if any(known in vendor_name for known in known_vendors) else 1
+            reputation_priority = 0 if KNOWN_VENDORS.search(vendor_name) else 1
             
             # 6. Sales contact quality (direct email = 0, webform = 1)
             sales_email = candidate.get("sales_email", "")
@@ -92,15 +87,10 @@ class Ranker:
         vendor_name = candidate.get("vendor_name", "").lower()
         
         # Check for manufacturer indicators
-        mfr_indicators = [
-            "manufacturer", "mfr", "direct", "official", "oem",
-            "factory", "headquarters", "corporate"
-        ]
-        
-        if any(indicator in notes for indicator in mfr_indicators):
+        if MANUFACTURER_INDICATORS.search(notes):
             return 0
         
-        if any(indicator in vendor_name for indicator in mfr_indicators):
+        if MANUFACTURER_INDICATORS.search(vendor_name):
             return 0
         
         return 1
@@ -110,13 +100,11 @@ class Ranker:
         vendor_name = candidate.get("vendor_name", "").lower()
         
         # Tier 1: Premium enterprise vendors
-        tier1_vendors = ["cdw", "insight", "wwt", "shi", "softcat", "optiv", "guidepoint"]
-        if any(vendor in vendor_name for vendor in tier1_vendors):
+        if TIER1_VENDORS.search(vendor_name):
             return 0
         
         # Tier 2: Well-known retailers
-        tier2_vendors = ["bh photo", "newegg", "micro center", "amazon", "best buy", "adorama"]
-        if any(vendor in vendor_name for vendor in tier2_vendors):
+        if TIER2_VENDORS.search(vendor_name):
             return 1
         
         # Tier 3: Other vendors
@@ -166,3 +154,22 @@ class Ranker:
             return tuple(scores)
         
         return sorted(candidates, key=multi_criteria_key)
+
+
+if __name__ == "__main__":
+    # Smoke check: python -m vendor_finder.pipeline.ranker
+    ranker = Ranker()
+    sample = [
+        {"vendor_name": "Acme Supply", "price": 90, "availability": "in_stock",
+         "delivery_window_days": 5, "notes": "", "sales_email": "webform"},
+        {"vendor_name": "Amazon", "price": 90, "availability": "in_stock",
+         "delivery_window_days": 5, "notes": "", "sales_email": ""},
+        {"vendor_name": "CDW", "price": 90, "availability": "in_stock",
+         "delivery_window_days": 5, "notes": "Official OEM partner", "sales_email": "sales@cdw.com"},
+    ]
+    assert [c["vendor_name"] for c in ranker.run(sample)] == ["CDW", "Amazon", "Acme Supply"]
+    assert [ranker._calculate_reputation_score(c) for c in sample] == [2, 1, 0]
+    assert [ranker._calculate_manufacturer_score(c) for c in sample] == [1, 1, 0]
+    criteria = ["stock", "price", "delivery", "manufacturer", "reputation", "contact"]
+    assert [c["vendor_name"] for c in ranker.rank_by_criteria(sample, criteria)] == ["CDW", "Amazon", "Acme Supply"]
+    print("ranker smoke check passed")
@@ -76,12 +76,13 @@ class Retriever:
             ]
         else:
             # Generic fallback URLs
+            terms = query.replace(" ", "+")
             product_urls = [
-                "https://www.amazon.com/s?k=" + query.replace(" ", "+"),
-                "https://www.bestbuy.com/site/searchpage.jsp?st=" + query.replace(" ", "+"),
-                "https://www.newegg.com/p/pl?d=" + query.replace(" ", "+"),
-                "https://www.bhphotovideo.com/c/search?Ntt=" + query.replace(" ", "+"),
-                "https://www.microcenter.com/search/search_results.aspx?Ntt=" + query.replace(" ", "+")
+                "https://www.amazon.com/s?k=" + terms,
+                "https://www.bestbuy.com/site/searchpage.jsp?st=" + terms,
+                "https://www.newegg.com/p/pl?d=" + terms,
+                "https://www.bhphotovideo.com/c/search?Ntt=" + terms,
+                "https://www.microcenter.com/search/search_results.aspx?Ntt=" + terms
             ]
         
         return product_urls[:top_n]
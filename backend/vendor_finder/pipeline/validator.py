@@ -6,6 +6,8 @@ US-only, link-health, spec/model checks, Wichita ETA validation.
 
 from typing import Dict, List, Optional
 
+from .keywords import ENTERPRISE_VENDORS, FAST_VENDORS, KNOWN_VENDORS, STANDARD_VENDORS
+
 US_STATES = {
     "al", "ak", "az", "ar", "ca", "co", "ct", "de", "fl", "ga", "hi", "ia", "id", 
     "il", "in", "ks", "ky", "la", "ma", "md", "me", "mi", "mn", "mo", "ms", "mt", 
@@ -99,13 +101,7 @@ class Validator:
         
         # Check vendor name for known US vendors
         vendor_name = candidate.get("vendor_name", "").lower()
-        us_vendors = [
-            "cdw", "bh photo", "newegg", "micro center", "insight", 
-            "amazon", "best buy", "adorama", "connection", "zones",
-            "wwt", "shi", "softcat", "optiv", "guidepoint"
-        ]
-        
-        return any(us_vendor in vendor_name for us_vendor in us_vendors)
+        return KNOWN_VENDORS.search(vendor_name)
 
     def _is_us_domain(self, url: str) -> bool:
         """Check if URL is from a US domain."""
@@ -188,18 +184,15 @@ class Validator:
         vendor_name = candidate.get("vendor_name", "").lower()
         
         # Fast shippers
-        fast_vendors = ["amazon", "best buy", "newegg"]
-        if any(fast in vendor_name for fast in fast_vendors):
+        if FAST_VENDORS.search(vendor_name):
             return 3
         
         # Standard shippers
-        standard_vendors = ["cdw", "bh photo", "micro center", "insight"]
-        if any(std in vendor_name for std in standard_vendors):
+        if STANDARD_VENDORS.search(vendor_name):
             return 5
         
         # Enterprise vendors (may be slower)
-        enterprise_vendors = ["wwt", "shi", "softcat", "optiv", "guidepoint"]
-        if any(ent in vendor_name for ent in enterprise_vendors):
+        if ENTERPRISE_VENDORS.search(vendor_name):
             return 7
         
         # Default